@@ -14,6 +14,7 @@ import json
 from src.config import Config
 from src.history import history_manager
 from src.agent import run_agent_mode, run_rag_mode
+from src.llm_factory import aclose_llm_http_pool
 
 
 async def main(
@@ -50,10 +51,14 @@ async def main(
         return
     
     # Run in selected mode
-    if mode == "rag":
-        await run_rag_mode(query, session_id)
+    try:
+        if mode == "rag":
+            await run_rag_mode(query, session_id)
         else:
-        await run_agent_mode(query, additional_servers, session_id)
+            await run_agent_mode(query, additional_servers, session_id)
+    finally:
+        # LLM connections are bound to this asyncio.run loop
+        await aclose_llm_http_pool()
 
 
 if __name__ == "__main__":
@@ -17,6 +17,12 @@ import argparse
 from datetime import datetime
 from typing import Dict, List, Optional
 
+# Prefer orjson for faster JSON decoding, fall back to the standard library
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    json_loads = json.loads
+
 # LangChain imports
 from langchain_core.tools import tool
 from langchain_community.vectorstores import FAISS
@@ -216,56 +222,82 @@ class MCPClientManager:
             mcp_servers: List of server configs, each with 'name', 'url', and optional 'headers'
         """
         self.mcp_servers = mcp_servers
-        self.sessions = []
         self.tools = []
+        # Each session is opened and closed by its own task, since the MCP
+        # client's cancel scopes must be exited in the task that entered them
+        self._server_tasks = []
+        self._closing = asyncio.Event()
         
     async def __aenter__(self):
         """Load tools from all configured MCP servers and keep sessions alive"""
         
-        for server_config in self.mcp_servers:
-            server_name = server_config.get("name", "Unknown")
-            server_url = server_config["url"]
-            server_headers = server_config.get("headers", {})
-            
-            print(f"Loading tools from {server_name} MCP server ({server_url})...")
+        # Connect to all servers concurrently; progress lines are buffered per
+        # server and printed afterwards in config order
+        loop = asyncio.get_running_loop()
+        outputs = [[] for _ in self.mcp_servers]
+        ready = [loop.create_future() for _ in self.mcp_servers]
+        self._server_tasks = [
+            asyncio.create_task(self._serve_one(server_config, output, tools_ready))
+            for server_config, output, tools_ready in zip(self.mcp_servers, outputs, ready)
+        ]
+        results = await asyncio.gather(*ready, return_exceptions=True)
+        
+        for server_config, output, result in zip(self.mcp_servers, outputs, results):
+            for line in output:
+                print(line)
             
-            try:
-                # Prepare server params
-                server_params = {"url": server_url}
-                if server_headers:
-                    server_params["headers"] = server_headers
-                
-                # Connect to server
-                client = streamablehttp_client(**server_params)
-                read, write, _ = await client.__aenter__()
-                session = ClientSession(read, write)
-                await session.__aenter__()
-                await session.initialize()
-                
-                # Load tools
-                tools = await load_mcp_tools(session)
-                self.tools.extend(tools)
-                self.sessions.append((client, session))
-                
-                print(f"✓ Loaded {len(tools)} tool(s) from {server_name} MCP server")
-                for tool in tools:
-                    print(f"  - {tool.name}: {tool.description}")
-            except Exception as e:
-                print(f"✗ Failed to load {server_name} MCP tools: {e}")
+            if isinstance(result, BaseException):
+                server_name = server_config.get("name", "Unknown")
+                print(f"✗ Failed to load {server_name} MCP tools: {result}")
+            else:
+                self.tools.extend(result)
             
             print()  # Empty line between servers
         
         return self.tools
     
+    async def _serve_one(self, server_config: dict, output: list, ready: asyncio.Future):
+        """Connect to one MCP server, publish its tools on ready and keep the session open until closing"""
+        server_name = server_config.get("name", "Unknown")
+        server_url = server_config["url"]
+        server_headers = server_config.get("headers", {})
+        
+        output.append(f"Loading tools from {server_name} MCP server ({server_url})...")
+        
+        # Prepare server params
+        server_params = {"url": server_url}
+        if server_headers:
+            server_params["headers"] = server_headers
+        
+        try:
+            # Connect to server
+            async with streamablehttp_client(**server_params) as (read, write, _):
+                async with ClientSession(read, write) as session:
+                    await session.initialize()
+                    
+                    # Load tools
+                    tools = await load_mcp_tools(session)
+                    
+                    output.append(f"✓ Loaded {len(tools)} tool(s) from {server_name} MCP server")
+                    for tool in tools:
+                        output.append(f"  - {tool.name}: {tool.description}")
+                    
+                    ready.set_result(tools)
+                    await self._closing.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                print(f"Error closing session: {e}")
+        finally:
+            if not ready.done():
+                ready.cancel()
+    
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Clean up all sessions"""
         print("\n🔄 Closing MCP sessions...")
-        for client, session in reversed(self.sessions):
-            try:
-                await session.__aexit__(None, None, None)
-                await client.__aexit__(None, None, None)
-            except Exception as e:
-                print(f"Error closing session: {e}")
+        self._closing.set()
+        await asyncio.gather(*self._server_tasks, return_exceptions=True)
         print("✓ All MCP sessions closed")
 
 # --- 4. Query Functions with History Support ---
@@ -390,8 +422,9 @@ def load_mcp_servers_config(additional_servers: list = None) -> list[dict]:
     env_servers = os.getenv("MCP_SERVERS")
     if env_servers:
         try:
-            servers.extend(json.loads(env_servers))
-            print(f"📝 Loaded {len(json.loads(env_servers))} server(s) from MCP_SERVERS env variable")
+            parsed = json_loads(env_servers)
+            servers.extend(parsed)
+            print(f"📝 Loaded {len(parsed)} server(s) from MCP_SERVERS env variable")
         except json.JSONDecodeError as e:
             print(f"⚠️  Failed to parse MCP_SERVERS env variable: {e}")
     
@@ -399,8 +432,8 @@ def load_mcp_servers_config(additional_servers: list = None) -> list[dict]:
     config_file = "mcp_servers.json"
     if os.path.exists(config_file):
         try:
-            with open(config_file, 'r') as f:
-                file_servers = json.load(f)
+            with open(config_file, 'rb') as f:
+                file_servers = json_loads(f.read())
                 servers.extend(file_servers)
                 print(f"📝 Loaded {len(file_servers)} server(s) from {config_file}")
         except Exception as e:
@@ -28,6 +28,8 @@ async def test_agent_memory():
     
     session_id = "memory_test"
     
+    # Queries share one session and recall earlier turns, so they run sequentially
+    
     # Query 1: Complex multi-part question
     print("📝 Query 1: Introduction + Knowledge Base Question")
     print("-"*80)
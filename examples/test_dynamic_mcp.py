@@ -2,11 +2,16 @@
 Test script for dynamic MCP server management
 """
 import requests
+from requests.adapters import HTTPAdapter
 import json
 import time
 
 BASE_URL = "http://localhost:8000"
 
+# Shared session keeps the connection to the API server alive between requests
+session = requests.Session()
+session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+
 def test_mcp_management():
     """Test MCP server management endpoints"""
     
@@ -17,7 +22,7 @@ def test_mcp_management():
     
     # Test 1: List current servers
     print("1️⃣  Listing current MCP servers...")
-    response = requests.get(f"{BASE_URL}/api/mcp-servers")
+    response = session.get(f"{BASE_URL}/api/mcp-servers")
     data = response.json()
     print(f"   Status: {data['status']}")
     print(f"   Count: {data['count']}")
@@ -32,7 +37,7 @@ def test_mcp_management():
         "name": "TestWeather",
         "url": "https://weather-test.com/mcp"
     }
-    response = requests.post(
+    response = session.post(
         f"{BASE_URL}/api/mcp-servers",
         json=new_server
     )
@@ -44,7 +49,7 @@ def test_mcp_management():
     
     # Test 3: List servers again (should have one more)
     print("3️⃣  Listing servers after addition...")
-    response = requests.get(f"{BASE_URL}/api/mcp-servers")
+    response = session.get(f"{BASE_URL}/api/mcp-servers")
     data = response.json()
     print(f"   Count: {data['count']} (was {initial_count})")
     print(f"   ✅ Successfully added!" if data['count'] == initial_count + 1 else "   ❌ Count mismatch!")
@@ -52,7 +57,7 @@ def test_mcp_management():
     
     # Test 4: Try to add duplicate (should fail)
     print("4️⃣  Trying to add duplicate server (should fail)...")
-    response = requests.post(
+    response = session.post(
         f"{BASE_URL}/api/mcp-servers",
         json=new_server
     )
@@ -64,7 +69,7 @@ def test_mcp_management():
     
     # Test 5: Delete the test server
     print("5️⃣  Deleting test server...")
-    response = requests.delete(f"{BASE_URL}/api/mcp-servers/TestWeather")
+    response = session.delete(f"{BASE_URL}/api/mcp-servers/TestWeather")
     data = response.json()
     print(f"   Status: {data['status']}")
     print(f"   Message: {data['message']}")
@@ -73,7 +78,7 @@ def test_mcp_management():
     
     # Test 6: List servers again (should be back to initial count)
     print("6️⃣  Listing servers after deletion...")
-    response = requests.get(f"{BASE_URL}/api/mcp-servers")
+    response = session.get(f"{BASE_URL}/api/mcp-servers")
     data = response.json()
     print(f"   Count: {data['count']} (was {initial_count})")
     print(f"   ✅ Successfully deleted!" if data['count'] == initial_count else "   ❌ Count mismatch!")
@@ -81,7 +86,7 @@ def test_mcp_management():
     
     # Test 7: Try to delete non-existent server
     print("7️⃣  Trying to delete non-existent server (should fail)...")
-    response = requests.delete(f"{BASE_URL}/api/mcp-servers/NonExistent")
+    response = session.delete(f"{BASE_URL}/api/mcp-servers/NonExistent")
     if response.status_code == 404:
         print(f"   ✅ Correctly returned 404: {response.json()['detail']}")
     else:
@@ -108,7 +113,7 @@ if __name__ == "__main__":
     
     try:
         # Check if server is running
-        response = requests.get(f"{BASE_URL}/health")
+        response = session.get(f"{BASE_URL}/health")
         if response.status_code == 200:
             print("✅ Server is ready!")
             print()
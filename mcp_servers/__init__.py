@@ -1,9 +1,27 @@
 """MCP Server implementations"""
-from .math_server import mcp as math_mcp
-from .weather import mcp_weather as weather_mcp
-from .web import mcp_web as web_mcp
-from .people import mcp_people as people_mcp
-from .jack import mcp2 as jack_mcp
+import importlib
+
+# Exported name -> (submodule, attribute); servers are imported on first access
+_LAZY_SERVERS = {
+    'math_mcp': ('.math_server', 'mcp'),
+    'weather_mcp': ('.weather', 'mcp_weather'),
+    'web_mcp': ('.web', 'mcp_web'),
+    'people_mcp': ('.people', 'mcp_people'),
+    'jack_mcp': ('.jack', 'mcp2'),
+}
 
 __all__ = ['math_mcp', 'weather_mcp', 'web_mcp', 'people_mcp', 'jack_mcp']
 
+
+def __getattr__(name):
+    """Import an MCP server module the first time its instance is requested"""
+    if name in _LAZY_SERVERS:
+        module_name, attr = _LAZY_SERVERS[name]
+        server = getattr(importlib.import_module(module_name, __name__), attr)
+        globals()[name] = server  # Cache so later lookups skip __getattr__
+        return server
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
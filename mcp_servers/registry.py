@@ -1,20 +1,40 @@
 """Registry for MCP servers"""
-from typing import Dict, Optional
-
-# Import all MCP servers
-from . import math_mcp, weather_mcp, web_mcp, people_mcp, jack_mcp
-
-# Registry mapping server names to their FastMCP instances
-MCP_SERVERS: Dict[str, any] = {
-    "math": math_mcp,
-    "weather": weather_mcp,
-    "web": web_mcp,
-    "people": people_mcp,
-    "jack": jack_mcp,
+import importlib
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional
+
+# Server name (lowercase) -> instance exported by the mcp_servers package
+_SERVER_EXPORTS: Dict[str, str] = {
+    "math": "math_mcp",
+    "weather": "weather_mcp",
+    "web": "web_mcp",
+    "people": "people_mcp",
+    "jack": "jack_mcp",
 }
 
 
-def get_mcp_server(server_name: str) -> Optional[any]:
+class _LazyServerRegistry(Mapping):
+    """Read-only mapping of server names to FastMCP instances, importing each server on first access"""
+
+    def __getitem__(self, server_name: str) -> Any:
+        export = _SERVER_EXPORTS[server_name]
+        # Resolved through the package's lazy __getattr__, so only this server's module is imported
+        return getattr(importlib.import_module(__package__), export)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(_SERVER_EXPORTS)
+
+    def __len__(self) -> int:
+        return len(_SERVER_EXPORTS)
+
+
+# Registry mapping server names to their FastMCP instances (keys are lowercase)
+MCP_SERVERS: Mapping = _LazyServerRegistry()
+
+
+@lru_cache(maxsize=64)
+def get_mcp_server(server_name: str) -> Optional[Any]:
     """Get an MCP server by name"""
     return MCP_SERVERS.get(server_name.lower())
 
@@ -22,5 +42,3 @@ def get_mcp_server(server_name: str) -> Optional[any]:
 def list_available_servers() -> list:
     """List all available MCP server names"""
     return list(MCP_SERVERS.keys())
-
-
@@ -1,17 +1,110 @@
 """
 Agent creation and query execution
 """
+import asyncio
+import logging
+
 from langchain.agents import create_agent
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.messages import HumanMessage, AIMessage, AIMessageChunk, ToolMessage
 
 from .config import Config
 from .history import history_manager
+from .llm_factory import create_llm_from_config, get_llm
+from .logging_setup import PARTIAL, get_output_logger
 from .rag import rag_system
+from .response_cache import response_cache
+from .semantic_cache import semantic_cache
 from .mcp_client import MCPClientManager
 from .tools import retrieve_dosiblog_context
 
 
+logger = get_output_logger(__name__)
+
+# Streamed answer tokens are batched into one output record per interval (seconds)
+TOKEN_FLUSH_INTERVAL = 0.05
+
+# Kept byte-identical across sessions and turns: together with the session
+# history it forms a prompt prefix that provider prompt caches can reuse until
+# acompact_session folds older turns into a summary
+AGENT_SYSTEM_PROMPT = (
+    "You are a helpful AI assistant with access to various tools including DosiBlog knowledge base. "
+    "Use the tools when needed to answer questions accurately."
+)
+
+
+def _flush_tokens(state: dict) -> None:
+    """Write the buffered answer tokens as a single partial output record"""
+    if state["flush_handle"] is not None:
+        state["flush_handle"].cancel()
+        state["flush_handle"] = None
+    if state["pending"]:
+        logger.info("%s", "".join(state["pending"]), extra=PARTIAL)
+        state["pending"].clear()
+
+
+def _handle_ai(token: AIMessage, state: dict) -> None:
+    """Merge a model message chunk and buffer any answer text it carries"""
+    is_chunk = type(token) is AIMessageChunk
+    model_step = state["model_step"]
+    state["model_step"] = model_step + token if is_chunk and model_step is not None else token
+    text = token.text
+    if not text or token.tool_calls or (is_chunk and token.tool_call_chunks):
+        return
+    state["answer_parts"].append(text)
+    if state["verbose"]:
+        if not state["mid_line"]:
+            logger.info("\n✅ Final Answer: ", extra=PARTIAL)
+            state["mid_line"] = True
+        state["pending"].append(text)
+        if state["flush_handle"] is None:
+            state["flush_handle"] = state["loop"].call_later(TOKEN_FLUSH_INTERVAL, _flush_tokens, state)
+
+
+def _handle_tool(token: ToolMessage, state: dict) -> None:
+    """Announce the tool calls of the finished model step and show a tool result"""
+    _flush_tokens(state)
+    if state["mid_line"]:
+        logger.info("")
+        state["mid_line"] = False
+    # First result of a tool step: announce the calls the model made
+    if state["model_step"] is not None:
+        if state["verbose"]:
+            for call in state["model_step"].tool_calls:
+                logger.info("🤖 Agent calling tool: %s", call['name'])
+                logger.info("   Input: %s", call.get('args', {}))
+        state["model_step"] = None
+        state["answer_parts"].clear()  # Text before tool calls is not the final answer
+    logger.info("🔧 Tool '%s' output: %s", token.name, token.content)
+
+
+# Stream event handlers keyed on the exact message type (one dict lookup per token)
+_HANDLERS = {
+    AIMessageChunk: _handle_ai,
+    AIMessage: _handle_ai,
+    ToolMessage: _handle_tool,
+}
+
+
+def create_agent_executor(mcp_tools: list):
+    """
+    Create the tool-calling agent over the local RAG tool and the given MCP tools
+    
+    Args:
+        mcp_tools: Tools loaded by MCPClientManager
+        
+    Returns:
+        Agent runnable to pass to run_agent_query
+    """
+    # Independent tool calls requested in one model turn are run concurrently
+    # by the agent's tool node (OpenAI requests parallel tool calls by default)
+    return create_agent(
+        # Built through the factory so the agent shares its memoized client and pooled connections
+        model=create_llm_from_config({"type": "openai", "model": Config.OPENAI_MODEL}, streaming=True),
+        tools=[retrieve_dosiblog_context] + mcp_tools,
+        system_prompt=AGENT_SYSTEM_PROMPT
+    )
+
+
 async def run_agent_query(agent_executor, question: str, session_id: str = "default"):
     """
     Run a query through the agent with history support
@@ -21,43 +114,48 @@ async def run_agent_query(agent_executor, question: str, session_id: str = "defa
         question: User's question
         session_id: Session identifier for history
     """
-    print(f"\n{'='*60}")
-    print(f"💬 User Query: {question}")
-    print(f"📝 Session ID: {session_id}")
-    print(f"{'='*60}\n")
+    logger.info("\n%s", '='*60)
+    logger.info("💬 User Query: %s", question)
+    logger.info("📝 Session ID: %s", session_id)
+    logger.info("%s\n", '='*60)
     
-    # Get chat history for this session
-    history = history_manager.get_session_messages(session_id)
+    # Get chat history for this session, once the previous turn has been saved
+    await history_manager.write_barrier.wait(session_id)
+    history = await history_manager.aget_session_messages(session_id)
     
     # Show conversation context if exists
     if history:
-        print(f"📚 Conversation History: {len(history)} previous messages")
+        logger.info("📚 Conversation History: %d previous messages", len(history))
     
-    # Build messages with history
-    messages = list(history) + [HumanMessage(content=question)]
+    # Build messages with history; until the session is compacted only the
+    # new question differs from the prompt sent on the previous turn
+    messages = [*history, HumanMessage(content=question)]
     inputs = {"messages": messages}
 
-    final_answer = ""
-    async for event in agent_executor.astream(inputs, stream_mode="values"):
-        last_msg = event["messages"][-1]
-
-        if isinstance(last_msg, AIMessage):
-            if getattr(last_msg, "tool_calls", None):
-                for call in last_msg.tool_calls:
-                    tool_input = call.get('args', call.get('input', {}))
-                    print(f"🤖 Agent calling tool: {call['name']}")
-                    print(f"   Input: {tool_input}")
-            else:
-                print(f"\n✅ Final Answer: {last_msg.content}\n")
-                final_answer = last_msg.content
-        
-        elif hasattr(last_msg, "tool_name"):
-            print(f"🔧 Tool '{last_msg.tool_name}' output: {last_msg.content}")
+    # Stream message chunks so answer tokens are shown as soon as they arrive;
+    # tokens are buffered and flushed on a timer rather than written one by one
+    state = {
+        "verbose": logger.isEnabledFor(logging.INFO),
+        "loop": asyncio.get_running_loop(),
+        "answer_parts": [],
+        "pending": [],
+        "flush_handle": None,
+        "model_step": None,  # Chunks of the current model turn, merged to recover tool calls
+        "mid_line": False,
+    }
+    
+    async for token, metadata in agent_executor.astream(inputs, stream_mode="messages"):
+        handler = _HANDLERS.get(type(token))
+        if handler:
+            handler(token, state)
+    
+    _flush_tokens(state)
+    if state["mid_line"]:
+        logger.info("\n")
+    final_answer = "".join(state["answer_parts"])
 
-    # Save to history
-    session_history = history_manager.get_session_history(session_id)
-    session_history.add_user_message(question)
-    session_history.add_ai_message(final_answer)
+    # Save to history in the background so the answer is returned right away
+    history_manager.save_turn_in_background(session_id, question, final_answer)
     
     return final_answer
 
@@ -70,22 +168,51 @@ async def run_rag_query(question: str, session_id: str = "default"):
         question: User's question
         session_id: Session identifier for history
     """
-    print(f"\n{'='*60}")
-    print(f"🔍 RAG Query: {question}")
-    print(f"📝 Session ID: {session_id}")
-    print(f"{'='*60}\n")
+    logger.info("\n%s", '='*60)
+    logger.info("🔍 RAG Query: %s", question)
+    logger.info("📝 Session ID: %s", session_id)
+    logger.info("%s\n", '='*60)
     
     # Get chat history for this session
-    history = history_manager.get_session_messages(session_id)
+    history = await history_manager.aget_session_messages(session_id)
     
     if history:
-        print(f"📚 Conversation History: {len(history)} previous messages")
+        logger.info("📚 Conversation History: %d previous messages", len(history))
+    
+    # Fresh sessions can reuse an earlier answer when the question and the
+    # retrieved context match; with history the answer may depend on prior turns
+    cache_key = None
+    question_embedding = None
+    if not history and rag_system.available:
+        docs = await rag_system.aretrieve_documents(question)
+        cache_key = response_cache.make_key(question, docs)
+        cached = response_cache.get(cache_key)
+        if cached is None and semantic_cache.available:
+            # Paraphrases miss the exact key; fall back to the nearest earlier question
+            question_embedding = await rag_system.embeddings.aembed_query(question)
+            cached = semantic_cache.lookup(question_embedding, docs)
+        if cached is not None:
+            answer = cached["answer"]
+            session_history = history_manager.get_session_history(session_id)
+            session_history.add_user_message(question)
+            session_history.add_ai_message(answer)
+            logger.info("\n✅ Answer (cached): %s\n", answer)
+            return answer
     
-    # Use RAG system with history
-    llm = ChatOpenAI(model=Config.OPENAI_MODEL, temperature=0)
-    answer = rag_system.query_with_history(question, session_id, llm)
+    # Use RAG system with history, writing tokens as they are generated
+    llm = get_llm(streaming=True, temperature=0)
+    logger.info("\n✅ Answer: ", extra=PARTIAL)
+    answer = ""
+    async for token in rag_system.astream_with_history(question, session_id, llm):
+        logger.info("%s", token, extra=PARTIAL)
+        answer += token
+    logger.info("\n")
     
-    print(f"\n✅ Answer: {answer}\n")
+    if cache_key and answer:
+        response_cache.put(cache_key, answer)
+        if question_embedding is not None:
+            semantic_cache.add(question_embedding, answer, docs)
+    history_manager.compact_in_background(session_id)
     
     return answer
 
@@ -106,7 +233,7 @@ async def run_agent_mode(
     # Load MCP servers configuration
     mcp_servers = Config.load_mcp_servers(additional_servers)
     
-    print(f"📡 Connecting to {len(mcp_servers)} MCP server(s)...\n")
+    logger.info("📡 Connecting to %d MCP server(s)...\n", len(mcp_servers))
     
     # Use context manager to keep MCP sessions alive
     async with MCPClientManager(mcp_servers) as mcp_tools:
@@ -114,27 +241,24 @@ async def run_agent_mode(
         # Combine with local DosiBlog RAG tool
         all_tools = [retrieve_dosiblog_context] + mcp_tools
         
-        print(f"\n📦 Total tools available: {len(all_tools)}")
-        print(f"   • Local RAG tools: 1 (DosiBlog)")
-        print(f"   • Remote MCP tools: {len(mcp_tools)}")
-        print(f"   • Session ID: {session_id}")
-        print(f"   • History: {len(history_manager.get_session_messages(session_id))} messages\n")
+        logger.info("\n📦 Total tools available: %d", len(all_tools))
+        logger.info("   • Local RAG tools: 1 (DosiBlog)")
+        logger.info("   • Remote MCP tools: %d", len(mcp_tools))
+        logger.info("   • Session ID: %s", session_id)
+        logger.info("   • History: %d messages\n", len(history_manager.get_session_messages(session_id)))
         
         # Create the agent with all tools
-        print("🔧 Creating agent with GPT-4o...")
-        agent_executor = create_agent(
-            model=Config.OPENAI_MODEL,
-            tools=all_tools,
-            system_prompt="You are a helpful AI assistant with access to various tools including DosiBlog knowledge base. Use the tools when needed to answer questions accurately."
-        )
-        print("✓ Agent created successfully!")
+        logger.info("🔧 Creating agent with GPT-4o...")
+        agent_executor = create_agent_executor(mcp_tools)
+        logger.info("✓ Agent created successfully!")
         
         # Run queries
         if query:
             await run_agent_query(agent_executor, query, session_id)
         else:
             # Default example queries with history
-            print("\n📝 Running example queries with conversation history...\n")
+            # Each query recalls earlier turns, so they must run in order
+            logger.info("\n📝 Running example queries with conversation history...\n")
             await run_agent_query(
                 agent_executor,
                 "My name is Abdullah and I want to know about DosiBlog",
@@ -152,7 +276,11 @@ async def run_agent_mode(
             )
             
             # Show session summary
+            await history_manager.write_barrier.wait(session_id)
             history_manager.show_session_info(session_id)
+        
+        # Finish background history writes before the event loop shuts down
+        await history_manager.write_barrier.wait_all()
 
 
 async def run_rag_mode(query: str = None, session_id: str = "default"):
@@ -166,8 +294,9 @@ async def run_rag_mode(query: str = None, session_id: str = "default"):
     if query:
         await run_rag_query(query, session_id)
     else:
-        # Example RAG queries with history
-        print("📝 Running example RAG queries with conversation history...\n")
+        # Example RAG queries with history ("it" refers back to DosiBlog), so
+        # they run in order
+        logger.info("📝 Running example RAG queries with conversation history...\n")
         await run_rag_query("What is DosiBlog?", session_id)
         await run_rag_query("Who created it?", session_id)
         await run_rag_query("What technologies does it use?", session_id)
@@ -19,9 +19,9 @@ import logging
 from src.config import Config
 from src.history import history_manager
 from src.agent import run_agent_mode, run_rag_mode
-from src.mcp_client import MCPClientManager
+from src.mcp_client import MCPClientManager, normalize_mcp_url
 from src.tools import retrieve_dosiblog_context
-from src.llm_factory import create_llm_from_config
+from src.llm_factory import create_llm_from_config, aclose_llm_http_pool
 from langchain.agents import create_agent
 from langchain_core.messages import HumanMessage, AIMessage
 from mcp_servers.registry import MCP_SERVERS, get_mcp_server, list_available_servers
@@ -64,6 +64,9 @@ async def mcp_lifespan(app: FastAPI):
             if hasattr(server, 'session_manager'):
                 await stack.enter_async_context(server.session_manager.run())
         yield
+        # Background compactions still use the shared LLM client
+        await history_manager.write_barrier.wait_all()
+        await aclose_llm_http_pool()
 
 
 # Initialize FastAPI app with MCP lifespan
@@ -146,7 +149,7 @@ async def chat(request: ChatRequest):
             
             llm_config = Config.load_llm_config()
             try:
-                llm = create_llm_from_config(llm_config, streaming=False, temperature=0)
+                llm = create_llm_from_config(llm_config, streaming=True, temperature=0)
             except ImportError as e:
                 raise HTTPException(
                     status_code=500,
@@ -154,11 +157,12 @@ async def chat(request: ChatRequest):
                 )
             except Exception as e:
                 raise HTTPException(status_code=500, detail=f"Failed to initialize LLM: {str(e)}")
-            answer = rag_system.query_with_history(
+            answer = await rag_system.aquery_with_history(
                 request.message, 
                 request.session_id, 
                 llm
             )
+            history_manager.compact_in_background(request.session_id)
             
             return ChatResponse(
                 response=answer,
@@ -201,8 +205,8 @@ async def chat(request: ChatRequest):
                     tools_context = "\n".join(tool_descriptions) if tool_descriptions else "No tools available"
                     
                     from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-                    history = history_manager.get_session_messages(request.session_id)
-                    context = rag_system.retrieve_context(request.message)
+                    history = await history_manager.aget_session_messages(request.session_id)
+                    context = await rag_system.aretrieve_context(request.message)
                     
                     prompt = ChatPromptTemplate.from_messages([
                         ("system", (
@@ -226,6 +230,7 @@ async def chat(request: ChatRequest):
                     session_history = history_manager.get_session_history(request.session_id)
                     session_history.add_user_message(request.message)
                     session_history.add_ai_message(answer)
+                    history_manager.compact_in_background(request.session_id)
                     
                     return ChatResponse(
                         response=answer,
@@ -265,8 +270,8 @@ async def chat(request: ChatRequest):
                     raise HTTPException(status_code=500, detail=f"Failed to create agent: {str(e)}")
                 
                 # Get history
-                history = history_manager.get_session_messages(request.session_id)
-                messages = list(history) + [HumanMessage(content=request.message)]
+                history = await history_manager.aget_session_messages(request.session_id)
+                messages = [*history, HumanMessage(content=request.message)]
                 
                 # Run agent
                 final_answer = ""
@@ -306,6 +311,7 @@ async def chat(request: ChatRequest):
                 session_history = history_manager.get_session_history(request.session_id)
                 session_history.add_user_message(request.message)
                 session_history.add_ai_message(final_answer)
+                history_manager.compact_in_background(request.session_id)
                 
                 return ChatResponse(
                     response=final_answer,
@@ -357,7 +363,7 @@ async def chat_stream(request: ChatRequest):
                     return
                 
                 # Get history
-                history = history_manager.get_session_messages(request.session_id)
+                history = await history_manager.aget_session_messages(request.session_id)
                 
                 # Build context
                 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
@@ -368,7 +374,7 @@ async def chat_stream(request: ChatRequest):
                 ])
                 
                 # Retrieve context
-                context = rag_system.retrieve_context(request.message)
+                context = await rag_system.aretrieve_context(request.message)
                 
                 # Stream response
                 full_response = ""
@@ -453,6 +459,7 @@ async def chat_stream(request: ChatRequest):
                 
                 yield f"data: {json.dumps({'chunk': '', 'done': True})}\n\n"
                 stream_completed = True
+                history_manager.compact_in_background(request.session_id)
                 
             else:
                 # Agent mode with streaming
@@ -499,8 +506,8 @@ async def chat_stream(request: ChatRequest):
                         from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
                         from src.rag import rag_system
                         
-                        history = history_manager.get_session_messages(request.session_id)
-                        context = rag_system.retrieve_context(request.message)
+                        history = await history_manager.aget_session_messages(request.session_id)
+                        context = await rag_system.aretrieve_context(request.message)
                         
                         prompt = ChatPromptTemplate.from_messages([
                             ("system", (
@@ -590,6 +597,7 @@ async def chat_stream(request: ChatRequest):
                         
                         yield f"data: {json.dumps({'chunk': '', 'done': True})}\n\n"
                         stream_completed = True
+                        history_manager.compact_in_background(request.session_id)
                         return
                     
                     # For OpenAI/Groq - use agent with tools
@@ -652,8 +660,8 @@ async def chat_stream(request: ChatRequest):
                         return
                     
                     # Get history
-                    history = history_manager.get_session_messages(request.session_id)
-                    messages = list(history) + [HumanMessage(content=request.message)]
+                    history = await history_manager.aget_session_messages(request.session_id)
+                    messages = [*history, HumanMessage(content=request.message)]
                     
                     # Stream agent responses
                     full_response = ""
@@ -763,6 +771,7 @@ async def chat_stream(request: ChatRequest):
                     
                     yield f"data: {json.dumps({'chunk': '', 'done': True, 'tools_used': tool_calls_made})}\n\n"
                     stream_completed = True
+                    history_manager.compact_in_background(request.session_id)
                     
         except asyncio.CancelledError:
             # Client disconnected - gracefully exit
@@ -806,7 +815,7 @@ async def chat_stream(request: ChatRequest):
 @app.get("/api/session/{session_id}", response_model=SessionInfo)
 async def get_session(session_id: str):
     """Get session information"""
-    messages = history_manager.get_session_messages(session_id)
+    messages = await history_manager.aget_session_messages(session_id)
     
     return SessionInfo(
         session_id=session_id,
@@ -836,7 +845,7 @@ async def list_sessions():
         "sessions": [
             {
                 "session_id": sid,
-                "message_count": len(history_manager.get_session_messages(sid))
+                "message_count": len(await history_manager.aget_session_messages(sid))
             }
             for sid in sessions
         ]
@@ -907,12 +916,7 @@ async def add_mcp_server(server: MCPServerRequest):
         config_file = Config.ROOT_DIR / Config.MCP_SERVERS_FILE
         
         # Normalize URL: remove /sse and ensure /mcp endpoint
-        normalized_url = server.url.rstrip('/')
-        if normalized_url.endswith('/sse'):
-            normalized_url = normalized_url[:-4]  # Remove /sse
-        if not normalized_url.endswith('/mcp'):
-            # If URL doesn't end with /mcp, append it
-            normalized_url = normalized_url.rstrip('/') + '/mcp'
+        normalized_url = normalize_mcp_url(server.url)
         
         # Prepare server config (include api_key if provided)
         server_config = {
@@ -1002,12 +1006,7 @@ async def update_mcp_server(server_name: str, server: MCPServerRequest):
         config_file = Config.ROOT_DIR / Config.MCP_SERVERS_FILE
         
         # Normalize URL: remove /sse and ensure /mcp endpoint
-        normalized_url = server.url.rstrip('/')
-        if normalized_url.endswith('/sse'):
-            normalized_url = normalized_url[:-4]  # Remove /sse
-        if not normalized_url.endswith('/mcp'):
-            # If URL doesn't end with /mcp, append it
-            normalized_url = normalized_url.rstrip('/') + '/mcp'
+        normalized_url = normalize_mcp_url(server.url)
         
         # Prepare server config (include api_key if provided)
         server_config = {
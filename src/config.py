@@ -2,7 +2,9 @@
 Configuration and environment management
 """
 import os
+import copy
 import json
+from functools import lru_cache
 from pathlib import Path
 
 # Load environment variables
@@ -12,6 +14,47 @@ try:
 except ImportError:
     print("⚠️  python-dotenv not available, using environment variables directly")
 
+# Use orjson for JSON parsing/serialization when available (several times faster)
+try:
+    import orjson
+    
+    json_loads = orjson.loads
+    
+    def json_dumps(obj, indent: bool = False) -> str:
+        """Serialize obj to a JSON string, optionally indented by two spaces"""
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode()
+except ImportError:
+    json_loads = json.loads
+    
+    def json_dumps(obj, indent: bool = False) -> str:
+        """Serialize obj to a JSON string, optionally indented by two spaces"""
+        return json.dumps(obj, indent=2 if indent else None)
+
+
+@lru_cache(maxsize=16)
+def _load_json_cached(path: str, mtime_ns: int):
+    """Parse a JSON file; keyed on mtime so edits to the file are picked up"""
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
+
+
+def load_json_file(path: Path):
+    """
+    Load a JSON file, reusing the parsed result while the file is unchanged.
+    Returns a deep copy so callers can modify it freely.
+    """
+    return copy.deepcopy(_load_json_cached(str(path), path.stat().st_mtime_ns))
+
+
+def _parse_env_servers(raw: str):
+    """Parse the MCP_SERVERS env value once, returning (servers, error)"""
+    if not raw:
+        return None, None
+    try:
+        return json_loads(raw), None
+    except ValueError as e:
+        return None, e
+
 
 class Config:
     """Application configuration"""
@@ -23,10 +66,17 @@ class Config:
     # MCP settings
     MCP_SERVERS_FILE = "config/mcp_servers.json"
     MCP_SERVERS_ENV = os.getenv("MCP_SERVERS")
+    _ENV_SERVERS, _ENV_SERVERS_ERROR = _parse_env_servers(MCP_SERVERS_ENV)
     
     # LLM settings
     LLM_CONFIG_FILE = "config/llm_config.json"
     
+    # Conversation history settings (in-memory unless a database URL is set)
+    HISTORY_DB_URL = os.getenv("HISTORY_DB_URL")
+    
+    # Logging settings (agent progress output is suppressed above INFO)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+    
     # Project root
     ROOT_DIR = Path(__file__).parent.parent
     
@@ -41,22 +91,20 @@ class Config:
         servers = []
         
         # Method 1: From environment variable
-        if cls.MCP_SERVERS_ENV:
-            try:
-                env_servers = json.loads(cls.MCP_SERVERS_ENV)
-                servers.extend(env_servers)
-                print(f"📝 Loaded {len(env_servers)} server(s) from MCP_SERVERS env variable")
-            except json.JSONDecodeError as e:
-                print(f"⚠️  Failed to parse MCP_SERVERS env variable: {e}")
+        if cls._ENV_SERVERS_ERROR is not None:
+            print(f"⚠️  Failed to parse MCP_SERVERS env variable: {cls._ENV_SERVERS_ERROR}")
+        elif cls._ENV_SERVERS is not None:
+            env_servers = copy.deepcopy(cls._ENV_SERVERS)
+            servers.extend(env_servers)
+            print(f"📝 Loaded {len(env_servers)} server(s) from MCP_SERVERS env variable")
         
         # Method 2: From config file
         config_file = cls.ROOT_DIR / cls.MCP_SERVERS_FILE
         if config_file.exists():
             try:
-                with open(config_file, 'r') as f:
-                    file_servers = json.load(f)
-                    servers.extend(file_servers)
-                    print(f"📝 Loaded {len(file_servers)} server(s) from {cls.MCP_SERVERS_FILE}")
+                file_servers = load_json_file(config_file)
+                servers.extend(file_servers)
+                print(f"📝 Loaded {len(file_servers)} server(s) from {cls.MCP_SERVERS_FILE}")
             except Exception as e:
                 print(f"⚠️  Failed to load {cls.MCP_SERVERS_FILE}: {e}")
         
@@ -80,23 +128,22 @@ class Config:
         config_file = cls.ROOT_DIR / cls.LLM_CONFIG_FILE
         if config_file.exists():
             try:
-                with open(config_file, 'r') as f:
-                    config = json.load(f)
-                    # Validate and clean the config
-                    if not config.get('model') or not config['model'].strip():
-                        # If model is empty, set default based on type
-                        llm_type = config.get('type', 'openai').lower()
-                        if llm_type == 'gemini':
-                            config['model'] = 'gemini-1.5-flash'
-                        elif llm_type == 'ollama':
-                            config['model'] = 'llama3.2'
-                        else:
-                            config['model'] = cls.OPENAI_MODEL
+                config = load_json_file(config_file)
+                # Validate and clean the config
+                if not config.get('model') or not config['model'].strip():
+                    # If model is empty, set default based on type
+                    llm_type = config.get('type', 'openai').lower()
+                    if llm_type == 'gemini':
+                        config['model'] = 'gemini-1.5-flash'
+                    elif llm_type == 'ollama':
+                        config['model'] = 'llama3.2'
                     else:
-                        config['model'] = config['model'].strip()
-                    
-                    print(f"📝 Loaded LLM config: {config.get('type', 'openai')} - {config.get('model', 'unknown')}")
-                    return config
+                        config['model'] = cls.OPENAI_MODEL
+                else:
+                    config['model'] = config['model'].strip()
+                
+                print(f"📝 Loaded LLM config: {config.get('type', 'openai')} - {config.get('model', 'unknown')}")
+                return config
             except Exception as e:
                 print(f"⚠️  Failed to load {cls.LLM_CONFIG_FILE}: {e}")
         
@@ -117,7 +164,7 @@ class Config:
         try:
             config_file = cls.ROOT_DIR / cls.LLM_CONFIG_FILE
             with open(config_file, 'w') as f:
-                json.dump(config, f, indent=2)
+                f.write(json_dumps(config, indent=True))
             print(f"✓ LLM config saved: {config.get('type', 'unknown')} - {config.get('model', 'unknown')}")
             return True
         except Exception as e:
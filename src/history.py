@@ -1,19 +1,221 @@
 """
 Conversation history management
 """
-from typing import Dict, List
-from langchain_community.chat_message_histories import ChatMessageHistory
+import asyncio
+from functools import lru_cache
+from typing import Dict, List, Optional, Set
+from langchain_community.chat_message_histories import ChatMessageHistory, SQLChatMessageHistory
 from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_core.messages import BaseMessage, HumanMessage
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+
+from .config import Config
+from .logging_setup import get_output_logger
+
+logger = get_output_logger(__name__)
+
+SUMMARY_PREFIX = "Summary of prior turns: "
+
+SUMMARY_PROMPT = (
+    "Summarize the following dialogue preserving names, facts, decisions "
+    "and any open questions. Be concise.\n\n{dialogue}"
+)
+
+
+def role_label(msg: BaseMessage) -> str:
+    """Human-readable role of a stored message"""
+    if isinstance(msg, HumanMessage):
+        return "User"
+    if isinstance(msg, SystemMessage):
+        return "Summary"
+    return "AI"
+
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """Load the tiktoken encoding on first use (None if tiktoken is unavailable)"""
+    # Loading it may download the BPE file, so it is kept out of import time
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(messages: List[BaseMessage]) -> int:
+    """Approximate the prompt size of a message list in tokens"""
+    text = "\n".join(str(msg.content) for msg in messages)
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return len(text) // 4  # Rough fallback when tiktoken is unavailable
+
+
+class SessionWriteBarrier:
+    """
+    Tracks background history writes per session
+    
+    Writes are scheduled as tasks so callers return without waiting for them;
+    the next turn of a session waits on its pending writes before reading.
+    Background work that readers need not wait for (e.g. compaction) is only
+    waited on at shutdown. Holding the tasks here also keeps them from being
+    garbage collected.
+    """
+    
+    def __init__(self):
+        self._pending: Dict[str, Set[asyncio.Task]] = {}
+        self._background: Set[asyncio.Task] = set()
+    
+    def track(self, session_id: str, task: asyncio.Task) -> None:
+        """Register a pending write task for a session"""
+        tasks = self._pending.setdefault(session_id, set())
+        tasks.add(task)
+        
+        def discard(done: asyncio.Task) -> None:
+            tasks.discard(done)
+            if not tasks and self._pending.get(session_id) is tasks:
+                del self._pending[session_id]
+        
+        task.add_done_callback(discard)
+    
+    def track_background(self, task: asyncio.Task) -> None:
+        """Register a task that only wait_all waits for"""
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+    
+    async def wait(self, session_id: str) -> None:
+        """Wait until all pending writes for a session have finished"""
+        # Writes scheduled while waiting are waited for as well
+        while tasks := self._pending.get(session_id):
+            await asyncio.gather(*tasks, return_exceptions=True)
+    
+    async def wait_all(self) -> None:
+        """Wait until all pending writes and background work have finished (e.g. before shutdown)"""
+        while tasks := [task for tasks in self._pending.values() for task in tasks] + list(self._background):
+            await asyncio.gather(*tasks, return_exceptions=True)
 
 
 class ConversationHistoryManager:
     """Manages conversation history for multiple sessions"""
     
-    def __init__(self):
-        """Initialize the history store"""
-        self.store: Dict[str, ChatMessageHistory] = {}
-        print("✓ Conversation History Manager initialized")
+    def __init__(
+        self,
+        max_tokens: int = 4000,
+        keep_last_k: int = 6,
+        db_url: Optional[str] = None,
+    ):
+        """
+        Initialize the history store
+        
+        Args:
+            max_tokens: Token budget for a session before older turns are summarized
+            keep_last_k: Number of most recent messages always kept verbatim
+            db_url: SQLAlchemy URL (e.g. sqlite:///data/history.db) to persist sessions
+                across restarts and workers; in-memory only when not set
+        """
+        self.store: Dict[str, BaseChatMessageHistory] = {}
+        self.max_tokens = max_tokens
+        self.keep_last_k = keep_last_k
+        self.write_barrier = SessionWriteBarrier()
+        
+        self._engine = None
+        if db_url:
+            from sqlalchemy import create_engine
+            self._engine = create_engine(db_url)
+            logger.info("✓ Conversation History Manager initialized (persistent: %s)", self._engine.url.render_as_string(hide_password=True))
+        else:
+            logger.info("✓ Conversation History Manager initialized")
+    
+    def _get_summary_llm(self):
+        """Get the LLM used for summarization, following the current LLM config"""
+        from .llm_factory import get_llm
+        return get_llm(streaming=False, temperature=0)
+    
+    async def acompact_session(self, session_id: str) -> bool:
+        """
+        Summarize older turns once a session exceeds its token budget
+        
+        Everything except the last keep_last_k messages is replaced by a single
+        summary SystemMessage, so the prompt sent each turn stays bounded
+        instead of growing with the whole conversation.
+        
+        Args:
+            session_id: Session to compact
+            
+        Returns:
+            True if the session was compacted
+        """
+        messages = await self.aget_session_messages(session_id)
+        if len(messages) <= self.keep_last_k or count_tokens(messages) <= self.max_tokens:
+            return False
+        
+        older = messages[:-self.keep_last_k]
+        dialogue = "\n".join(
+            f"{role_label(msg)}: {msg.content}"
+            for msg in older
+        )
+        
+        try:
+            result = await self._get_summary_llm().ainvoke(SUMMARY_PROMPT.format(dialogue=dialogue))
+        except Exception as e:
+            # Keep the full history if summarization fails
+            logger.warning("⚠️  Failed to summarize session %s: %s", session_id, e)
+            return False
+        
+        # Let turn writes that are in flight in a worker thread land first; nothing
+        # is awaited from here on, so none can interleave with the rewrite below
+        await self.write_barrier.wait(session_id)
+        
+        # Keep anything appended while the summary was being generated
+        current = self.get_session_messages(session_id)
+        if current[:len(older)] != older:
+            return False
+        session_history = self.get_session_history(session_id)
+        session_history.clear()
+        session_history.add_messages(
+            [SystemMessage(content=SUMMARY_PREFIX + str(result.content))] + current[len(older):]
+        )
+        logger.info("🗜️  Summarized %d older messages in session: %s", len(older), session_id)
+        return True
+    
+    def compact_in_background(self, session_id: str) -> None:
+        """Schedule acompact_session as background work, so the caller does not wait on summarization"""
+        async def compact():
+            try:
+                await self.acompact_session(session_id)
+            except Exception as e:
+                logger.warning("⚠️  Failed to compact session %s: %s", session_id, e)
+        
+        self.write_barrier.track_background(asyncio.create_task(compact()))
+    
+    def save_turn_in_background(self, session_id: str, question: str, answer: str) -> None:
+        """
+        Append a question/answer turn without making the caller wait for it
+        
+        The write (a database round trip when persistent) runs as a background
+        task; call write_barrier.wait(session_id) before reading the session
+        again. Any resulting compaction runs afterwards as separate background
+        work, so the next turn does not wait on its summarization request.
+        """
+        # Resolved on the event loop: the session store is not thread-safe
+        session_history = self.get_session_history(session_id)
+        
+        def add_turn():
+            session_history.add_user_message(question)
+            session_history.add_ai_message(answer)
+        
+        async def persist():
+            try:
+                if self._engine is not None:
+                    # Only the database calls run in a worker thread
+                    await asyncio.to_thread(add_turn)
+                else:
+                    add_turn()
+            except Exception as e:
+                logger.warning("⚠️  Failed to save history for session %s: %s", session_id, e)
+                return
+            self.compact_in_background(session_id)
+        
+        self.write_barrier.track(session_id, asyncio.create_task(persist()))
     
     def get_session_history(self, session_id: str) -> BaseChatMessageHistory:
         """
@@ -23,28 +225,65 @@ class ConversationHistoryManager:
             session_id: Unique identifier for the conversation session
             
         Returns:
-            ChatMessageHistory for the session
+            ChatMessageHistory (or SQLChatMessageHistory when persistent) for the session
         """
         if session_id not in self.store:
-            self.store[session_id] = ChatMessageHistory()
-            print(f"📝 Created new conversation session: {session_id}")
+            if self._engine is not None:
+                self.store[session_id] = SQLChatMessageHistory(
+                    session_id=session_id, connection=self._engine
+                )
+                logger.info("📝 Opened conversation session: %s", session_id)
+            else:
+                self.store[session_id] = ChatMessageHistory()
+                logger.info("📝 Created new conversation session: %s", session_id)
         return self.store[session_id]
     
     def get_session_messages(self, session_id: str) -> List[BaseMessage]:
-        """Get all messages from a session"""
+        """
+        Get all messages from a session
+        
+        Turns are appended, so earlier turns serialize identically on every
+        request and the prompt prefix stays cacheable by the LLM provider
+        until acompact_session replaces older turns with a summary.
+        """
         if session_id in self.store:
             return self.store[session_id].messages
+        if self._engine is not None:
+            # Read without caching (or announcing) a history for sessions that are only looked at
+            return SQLChatMessageHistory(session_id=session_id, connection=self._engine).messages
         return []
     
+    async def aget_session_messages(self, session_id: str) -> List[BaseMessage]:
+        """Get all messages from a session, reading a persistent session in a worker thread"""
+        if self._engine is None:
+            return self.get_session_messages(session_id)
+        # Resolved on the event loop: the session store is not thread-safe
+        session_history = self.store.get(session_id)
+        if session_history is None:
+            return await asyncio.to_thread(
+                lambda: SQLChatMessageHistory(session_id=session_id, connection=self._engine).messages
+            )
+        return await asyncio.to_thread(lambda: session_history.messages)
+    
     def clear_session(self, session_id: str) -> None:
         """Clear history for a specific session"""
-        if session_id in self.store:
-            self.store[session_id].clear()
-            print(f"🗑️  Cleared session: {session_id}")
+        if session_id in self.store or self._engine is not None:
+            self.get_session_history(session_id).clear()
+            logger.info("🗑️  Cleared session: %s", session_id)
     
     def list_sessions(self) -> List[str]:
         """List all active session IDs"""
-        return list(self.store.keys())
+        sessions = list(self.store.keys())
+        if self._engine is not None:
+            from sqlalchemy import text
+            try:
+                with self._engine.connect() as conn:
+                    rows = conn.execute(text("SELECT DISTINCT session_id FROM message_store"))
+                    sessions.extend(row[0] for row in rows if row[0] not in self.store)
+            except Exception:
+                # Table is created lazily with the first persisted session
+                pass
+        return sessions
     
     def get_session_summary(self, session_id: str) -> str:
         """Get a summary of the session"""
@@ -53,29 +292,29 @@ class ConversationHistoryManager:
     
     def show_session_info(self, session_id: str = None) -> None:
         """Display information about sessions"""
-        print(f"\n{'='*60}")
-        print("📊 Session Information")
-        print(f"{'='*60}\n")
+        logger.info("\n%s", '='*60)
+        logger.info("📊 Session Information")
+        logger.info("%s\n", '='*60)
         
         if session_id:
             messages = self.get_session_messages(session_id)
-            print(f"Session: {session_id}")
-            print(f"Messages: {len(messages)}\n")
+            logger.info("Session: %s", session_id)
+            logger.info("Messages: %d\n", len(messages))
             
             for i, msg in enumerate(messages, 1):
-                role = "User" if isinstance(msg, HumanMessage) else "AI"
+                role = role_label(msg)
                 content = msg.content[:100] + "..." if len(msg.content) > 100 else msg.content
-                print(f"  {i}. [{role}] {content}")
+                logger.info("  %d. [%s] %s", i, role, content)
         else:
             sessions = self.list_sessions()
-            print(f"Active Sessions: {len(sessions)}\n")
+            logger.info("Active Sessions: %d\n", len(sessions))
             
             for session in sessions:
-                print(f"  • {self.get_session_summary(session)}")
+                logger.info("  • %s", self.get_session_summary(session))
         
-        print()
+        logger.info("")
 
 
 # Global history manager instance
-history_manager = ConversationHistoryManager()
+history_manager = ConversationHistoryManager(db_url=Config.HISTORY_DB_URL)
 
@@ -1,48 +1,157 @@
 """
 LLM Factory - Creates LLM instances based on configuration
 """
+import asyncio
+import warnings
+import weakref
+from functools import lru_cache
+import httpx
 from langchain_openai import ChatOpenAI
-from typing import Optional
+from typing import Any, Optional
 import os
 
-# Try to import ChatOllama from langchain_ollama (preferred) or fallback to langchain_community
-try:
-    from langchain_ollama import ChatOllama
-except ImportError:
+from .config import Config
+
+
+def _load_chat_ollama():
+    """Import ChatOllama from langchain_ollama (preferred) or fallback to langchain_community"""
     try:
-        from langchain_community.chat_models import ChatOllama
+        from langchain_ollama import ChatOllama
     except ImportError:
-        ChatOllama = None
+        try:
+            from langchain_community.chat_models import ChatOllama
+        except ImportError:
+            return None
+    return ChatOllama
 
-# Try to import ChatGoogleGenerativeAI for Gemini support
-try:
-    from langchain_google_genai import ChatGoogleGenerativeAI
-except ImportError:
+
+def _load_chat_gemini():
+    """Import ChatGoogleGenerativeAI for Gemini support"""
     try:
-        from langchain_community.chat_models import ChatGoogleGenerativeAI
+        from langchain_google_genai import ChatGoogleGenerativeAI
     except ImportError:
-        # Try to add common installation paths
-        import sys
-        import os
-        common_paths = [
-            '/home/jack/.local/share/uv/lib/python3.13/site-packages',
-            os.path.expanduser('~/.local/lib/python3.13/site-packages'),
-            '/usr/local/lib/python3.13/site-packages',
-        ]
-        for path in common_paths:
-            if os.path.exists(path) and path not in sys.path:
-                sys.path.insert(0, path)
-        
         try:
-            from langchain_google_genai import ChatGoogleGenerativeAI
+            from langchain_community.chat_models import ChatGoogleGenerativeAI
         except ImportError:
-            ChatGoogleGenerativeAI = None
+            # Try to add common installation paths
+            import sys
+            common_paths = [
+                '/home/jack/.local/share/uv/lib/python3.13/site-packages',
+                os.path.expanduser('~/.local/lib/python3.13/site-packages'),
+                '/usr/local/lib/python3.13/site-packages',
+            ]
+            for path in common_paths:
+                if os.path.exists(path) and path not in sys.path:
+                    sys.path.insert(0, path)
+            
+            try:
+                from langchain_google_genai import ChatGoogleGenerativeAI
+            except ImportError:
+                return None
+    return ChatGoogleGenerativeAI
+
+
+# Optional provider classes are imported on first use, so only the configured
+# provider's dependencies are loaded; None marks a provider that is not installed
+_PROVIDER_LOADERS = {
+    "ollama": _load_chat_ollama,
+    "gemini": _load_chat_gemini,
+}
+_PROVIDER_CACHE: dict[str, Any] = {}
+
 
+def _get_provider_class(llm_type: str):
+    """Get the chat model class for an optional provider, importing it once"""
+    if llm_type not in _PROVIDER_CACHE:
+        _PROVIDER_CACHE[llm_type] = _PROVIDER_LOADERS[llm_type]()
+    return _PROVIDER_CACHE[llm_type]
 
-def create_llm_from_config(config: dict, streaming: bool = False, temperature: float = 0):
+
+# Common Gemini model names for validation hints
+GEMINI_COMMON_MODELS = [
+    "gemini-1.5-pro", "gemini-1.5-flash", "gemini-pro",
+    "gemini-2.0-flash", "gemini-2.0-flash-lite", "gemini-2.0-flash-exp",
+    "gemini-2.5-flash", "gemini-2.5-flash-lite",
+    "gemini-2.5-pro"
+]
+
+def _check_gemini_model_name(model: str) -> None:
+    """Warn early about a Gemini model name that is not a known model or a versioned variant of one"""
+    name = model.removeprefix("models/")
+    # Full names are compared, so "gemini-2.5-flsh" is flagged while
+    # variants such as "gemini-1.5-flash-002" or "gemini-2.5-pro-preview-05-06" are not
+    if not any(name == m or name.startswith(m + "-") for m in GEMINI_COMMON_MODELS):
+        warnings.warn(
+            f"Unrecognized Gemini model name '{model}'. Common models: "
+            f"{', '.join(GEMINI_COMMON_MODELS)}",
+            stacklevel=3
+        )
+
+
+def _create_http_transport() -> httpx.AsyncHTTPTransport:
+    """Create a connection pool for the OpenAI-compatible LLMs"""
+    limits = httpx.Limits(max_keepalive_connections=64, max_connections=128)
+    try:
+        return httpx.AsyncHTTPTransport(http2=True, limits=limits)
+    except ImportError:
+        # HTTP/2 needs the optional 'h2' package; pooling still works over HTTP/1.1
+        return httpx.AsyncHTTPTransport(limits=limits)
+
+
+class _PerLoopTransport(httpx.AsyncBaseTransport):
+    """
+    Connection pool created lazily for each running event loop
+    
+    Pooled connections are bound to the loop that opened them, while LLM
+    instances are memoized for the whole process and used from several loops
+    (each asyncio.run in the CLI, the uvicorn loop).
+    """
+    
+    def __init__(self):
+        # Keyed weakly, so a pool is dropped with its loop if it was never closed
+        self._pools = weakref.WeakKeyDictionary()
+    
+    def _pool(self) -> httpx.AsyncHTTPTransport:
+        """Get the current loop's pool, creating it on first use"""
+        loop = asyncio.get_running_loop()
+        pool = self._pools.get(loop)
+        if pool is None:
+            pool = self._pools[loop] = _create_http_transport()
+        return pool
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send the request over a connection pooled for the current loop"""
+        return await self._pool().handle_async_request(request)
+    
+    async def aclose(self) -> None:
+        """Close the current loop's pool; the next request opens a new one"""
+        pool = self._pools.pop(asyncio.get_running_loop(), None)
+        if pool is not None:
+            await pool.aclose()
+
+
+# One connection pool per event loop for every LLM instance, so requests reuse
+# warm TLS connections instead of paying a handshake per client
+_HTTP_TRANSPORT = _PerLoopTransport()
+_SHARED_HTTPX = httpx.AsyncClient(transport=_HTTP_TRANSPORT, timeout=60)
+
+
+async def aclose_llm_http_pool() -> None:
+    """
+    Close the LLM connection pool of the running event loop
+    
+    Call before the loop shuts down (FastAPI lifespan, end of a CLI run).
+    """
+    await _HTTP_TRANSPORT.aclose()
+
+
+def create_llm_from_config(config: dict, streaming: bool = True, temperature: float = 0):
     """
     Create an LLM instance based on configuration.
     
+    Instances are memoized per (config, streaming, temperature), so repeated
+    calls reuse the same client and its warm HTTP connections.
+    
     Supported types:
     - openai: OpenAI models (requires api_key and model)
     - groq: Groq models (requires api_key and model)
@@ -55,18 +164,57 @@ def create_llm_from_config(config: dict, streaming: bool = False, temperature: f
             - model: Model name
             - api_key: API key (for openai/groq/gemini)
             - base_url: Base URL (for ollama, defaults to http://localhost:11434)
+            - keep_alive: How long Ollama keeps the model loaded (for ollama, defaults to "1h")
             - api_base: Custom API base URL (optional, for openai/groq)
-        streaming: Whether to enable streaming
+        streaming: Whether to enable streaming (default True so astream yields
+            tokens as they arrive; all providers use their async clients there)
         temperature: Temperature for the model
         
     Returns:
         LLM instance (ChatOpenAI, ChatOllama, etc.)
     """
+    try:
+        frozen_config = tuple(sorted(config.items()))
+        hash(frozen_config)
+    except TypeError:
+        # Unhashable config values (e.g. nested dicts) - build without caching
+        return _build_llm(config, streaming, temperature)
+    return _build_llm_cached(frozen_config, streaming, temperature)
+
+
+@lru_cache(maxsize=8)
+def _build_llm_cached(frozen_config: tuple, streaming: bool, temperature: float):
+    """Memoized _build_llm keyed on the frozen config items"""
+    return _build_llm(dict(frozen_config), streaming, temperature)
+
+
+def _llm_config_mtime_ns() -> Optional[int]:
+    """Modification time of the LLM config file, or None when it does not exist"""
+    try:
+        return (Config.ROOT_DIR / Config.LLM_CONFIG_FILE).stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+@lru_cache(maxsize=8)
+def _get_llm_cached(config_mtime_ns: Optional[int], streaming: bool, temperature: float):
+    """get_llm keyed on the config file's mtime, so the file is only re-read after it changes"""
+    return create_llm_from_config(Config.load_llm_config(), streaming=streaming, temperature=temperature)
+
+
+def get_llm(streaming: bool = True, temperature: float = 0):
+    """Get the (shared) LLM instance for the configured provider"""
+    return _get_llm_cached(_llm_config_mtime_ns(), streaming, temperature)
+
+
+def _build_llm(config: dict, streaming: bool, temperature: float):
+    """Construct a new LLM instance; see create_llm_from_config"""
     llm_type = config.get("type", "openai").lower()
     model = config.get("model", "gpt-4o")
     
     if llm_type == "ollama":
         # Local Ollama instance
+        ChatOllama = _get_provider_class("ollama")
         if ChatOllama is None:
             raise ImportError(
                 "ChatOllama is not available. Ensure 'langchain-ollama' is in requirements.txt and redeploy."
@@ -79,6 +227,9 @@ def create_llm_from_config(config: dict, streaming: bool = False, temperature: f
                 base_url=base_url,
                 temperature=temperature,
                 streaming=streaming,
+                # Keep the model loaded between requests so Ollama can reuse the
+                # KV cache of the shared system-prompt prefix instead of re-prefilling
+                keep_alive=config.get("keep_alive", "1h"),
                 timeout=60.0  # Increase timeout for Docker
             )
         except Exception as e:
@@ -99,11 +250,13 @@ def create_llm_from_config(config: dict, streaming: bool = False, temperature: f
             api_key=api_key,
             base_url="https://api.groq.com/openai/v1",
             temperature=temperature,
-            streaming=streaming
+            streaming=streaming,
+            http_async_client=_SHARED_HTTPX
         )
     
     elif llm_type == "gemini":
         # Google Gemini API
+        ChatGoogleGenerativeAI = _get_provider_class("gemini")
         if ChatGoogleGenerativeAI is None:
             raise ImportError(
                 "ChatGoogleGenerativeAI is not available. Ensure 'langchain-google-genai' is in requirements.txt and redeploy."
@@ -113,22 +266,17 @@ def create_llm_from_config(config: dict, streaming: bool = False, temperature: f
         if not api_key:
             raise ValueError("Google API key is required for Gemini. Get one from https://aistudio.google.com/app/apikey")
         
+        # Flag likely typos before any request is made; only a warning so
+        # newly released models still work
+        _check_gemini_model_name(model)
+        
         try:
-            # Common Gemini model names for validation hints
-            common_models = [
-                "gemini-1.5-pro", "gemini-1.5-flash", "gemini-pro",
-                "gemini-2.0-flash-exp", "gemini-2.5-flash", "gemini-2.5-flash-lite",
-                "gemini-2.5-pro"
-            ]
-            
-            llm = ChatGoogleGenerativeAI(
+            return ChatGoogleGenerativeAI(
                 model=model,
                 google_api_key=api_key,
                 temperature=temperature,
                 streaming=streaming
             )
-            
-            return llm
         except Exception as e:
             error_msg = str(e)
             
@@ -137,7 +285,7 @@ def create_llm_from_config(config: dict, streaming: bool = False, temperature: f
                 raise ValueError(
                     f"Invalid Gemini model name: '{model}'. "
                     f"Please check the model name. Common models: "
-                    f"{', '.join(common_models)}. "
+                    f"{', '.join(GEMINI_COMMON_MODELS)}. "
                     f"Error details: {error_msg}"
                 )
             elif "API_KEY" in error_msg or "authentication" in error_msg.lower():
@@ -166,7 +314,8 @@ def create_llm_from_config(config: dict, streaming: bool = False, temperature: f
             "model": model,
             "api_key": api_key,
             "temperature": temperature,
-            "streaming": streaming
+            "streaming": streaming,
+            "http_async_client": _SHARED_HTTPX
         }
         
         if api_base:
@@ -0,0 +1,50 @@
+"""
+Console output through a queued logging handler
+"""
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+
+from .config import Config
+
+
+class _OutputFormatter(logging.Formatter):
+    """Ends each record with a newline unless it is a partial (streamed token) record"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        msg = super().format(record)
+        return msg if getattr(record, "partial", False) else msg + "\n"
+
+
+# Pass as extra= to continue the current output line instead of ending it
+PARTIAL = {"partial": True}
+
+# Progress output is queued and written to stdout by a background thread,
+# so the event loop never blocks on a slow terminal or pipe
+_log_queue = queue.Queue(-1)
+_log_handler = logging.StreamHandler(sys.stdout)
+_log_handler.terminator = ""
+_log_handler.setFormatter(_OutputFormatter())
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+
+def get_output_logger(name: str) -> logging.Logger:
+    """
+    Get a logger whose records are written to stdout off the event loop
+    
+    Args:
+        name: Logger name
+    
+    Returns:
+        Logger at Config.LOG_LEVEL writing through the shared output queue
+    """
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        logger.setLevel(Config.LOG_LEVEL)
+        logger.addHandler(logging.handlers.QueueHandler(_log_queue))
+        logger.propagate = False
+    return logger
@@ -1,16 +1,292 @@
 """
 MCP (Model Context Protocol) client management
 """
+import asyncio
+import hashlib
+from contextlib import AsyncExitStack
+import json
+import logging
+import os
+import time
+import httpx
+from pathlib import Path
 from mcp import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
-from langchain_mcp_adapters.tools import load_mcp_tools
-from typing import List
-from langchain_core.tools import BaseTool
+from mcp.shared.exceptions import McpError
+from mcp.types import Tool as MCPTool
+from langchain_mcp_adapters.tools import load_mcp_tools, convert_mcp_tool_to_langchain_tool
+from typing import Any, Dict, List, Optional
+from langchain_core.tools import BaseTool, StructuredTool, ToolException
+
+from .config import json_loads, json_dumps
+from .logging_setup import get_output_logger
+
+
+logger = get_output_logger("rag_mcp.client")
+
+
+def normalize_mcp_url(url: str) -> str:
+    """Normalize an MCP server URL: drop a trailing slash and /sse, and ensure the /mcp endpoint"""
+    url = url.rstrip('/').removesuffix('/sse')
+    return url if url.endswith('/mcp') else url + '/mcp'
+
+
+# mcp_servers.registry is resolved on first use and then kept here, so the local
+# server package is only imported when prefer_local is actually used
+_get_mcp_server = None
+
+
+def _resolve_get_mcp_server():
+    """Import mcp_servers.registry.get_mcp_server once and cache it"""
+    global _get_mcp_server
+    if _get_mcp_server is None:
+        from mcp_servers.registry import get_mcp_server
+        _get_mcp_server = get_mcp_server
+    return _get_mcp_server
+
+
+# On-disk catalog of tool schemas per server, so warm starts skip the handshake
+# and connect to a server only when one of its tools is actually called
+TOOL_CACHE_PATH = Path("~/.cache/rag-mcp/tool_catalog.json").expanduser()
+TOOL_CACHE_TTL = 300  # seconds
+
+
+def _catalog_key(server_config: dict, final_url: str) -> str:
+    """Key a server's catalog entry on its full config, so any config change invalidates it"""
+    fingerprint = json.dumps({"url": final_url, "config": server_config}, sort_keys=True, default=str)
+    return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+
+def _read_tool_cache() -> dict:
+    """Read the tool schema cache, returning an empty cache if missing or corrupt"""
+    try:
+        with open(TOOL_CACHE_PATH, 'rb') as f:
+            return json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+
+
+def _get_cached_tool_schemas(key: str) -> Optional[list]:
+    """Get cached tool schemas for a catalog key if they are still fresh"""
+    entry = _read_tool_cache().get(key)
+    if entry and time.time() - entry.get("fetched_at", 0) < TOOL_CACHE_TTL:
+        return entry.get("tools")
+    return None
+
+
+def _write_tool_cache(cache: dict) -> None:
+    """Write the tool schema cache, logging (not raising) if it cannot be written"""
+    try:
+        TOOL_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(TOOL_CACHE_PATH, 'w') as f:
+            f.write(json_dumps(cache))
+    except OSError as e:
+        logger.warning("Note: Could not write MCP tool cache: %s", e)
+
+
+def _save_tool_schemas(key: str, tools: List[BaseTool]) -> None:
+    """Persist the schemas of tools loaded from a server under its catalog key"""
+    schemas = [
+        {
+            "name": tool.name,
+            "description": tool.description,
+            "inputSchema": tool.args_schema if isinstance(tool.args_schema, dict) else tool.get_input_schema().model_json_schema(),
+        }
+        for tool in tools
+    ]
+    cache = _read_tool_cache()
+    cache[key] = {"fetched_at": time.time(), "tools": schemas}
+    _write_tool_cache(cache)
+
+
+def _drop_tool_schemas(key: str) -> None:
+    """Remove a catalog entry, so the next start does a full handshake with that server"""
+    cache = _read_tool_cache()
+    if cache.pop(key, None) is not None:
+        _write_tool_cache(cache)
+
+
+def _create_http_pool() -> httpx.AsyncHTTPTransport:
+    """Create the connection pool shared by all MCP sessions of a manager"""
+    limits = httpx.Limits(max_keepalive_connections=64, keepalive_expiry=60)
+    try:
+        return httpx.AsyncHTTPTransport(http2=True, retries=1, limits=limits)
+    except ImportError:
+        # HTTP/2 needs the optional 'h2' package; pooling still works over HTTP/1.1
+        return httpx.AsyncHTTPTransport(retries=1, limits=limits)
+
+
+class _SharedTransport(httpx.AsyncBaseTransport):
+    """
+    Per-client view of a shared connection pool
+    
+    The MCP client closes its httpx client when a session ends; closing this
+    transport leaves the shared pool (and its warm connections) open.
+    """
+    
+    def __init__(self, pool: httpx.AsyncHTTPTransport):
+        self._pool = pool
+    
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Send the request over a pooled connection"""
+        return await self._pool.handle_async_request(request)
+    
+    async def aclose(self) -> None:
+        """Leave the shared pool open; MCPClientManager closes it"""
+
+
+class _LazyMCPConnection:
+    """
+    MCP server connection opened on the first call to one of its cached tools
+    
+    The connection is entered and exited inside one dedicated task, since the
+    MCP client's cancel scopes must be exited in the task that entered them.
+    Used in place of a client in MCPClientManager.server_pool, which closes it via stop().
+    """
+    
+    def __init__(self, server_name: str, server_params: dict, schemas: list, cache_key: str, timeout: float):
+        self.server_name = server_name
+        self.server_params = server_params
+        self.schemas = schemas
+        self.cache_key = cache_key
+        self.timeout = timeout
+        self._ready: Optional[asyncio.Future] = None
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    async def _run(self, ready: asyncio.Future) -> None:
+        """Open the connection, publish its tools and hold it open until closed"""
+        try:
+            async with AsyncExitStack() as stack:
+                async with asyncio.timeout(self.timeout):
+                    read, write, _ = await stack.enter_async_context(streamablehttp_client(**self.server_params))
+                    session = await stack.enter_async_context(ClientSession(read, write))
+                    await session.initialize()
+                ready.set_result({
+                    schema["name"]: convert_mcp_tool_to_langchain_tool(session, MCPTool.model_validate(schema))
+                    for schema in self.schemas
+                })
+                await self._closing.wait()
+        except Exception as e:
+            if not ready.done():
+                # The cached catalog may be what is stale (moved or changed server)
+                _drop_tool_schemas(self.cache_key)
+                ready.set_exception(e)
+        finally:
+            if not ready.done():
+                ready.cancel()
+            # Failed or dropped connection: let the next call reconnect
+            if self._ready is ready and not self._closing.is_set():
+                self._ready = None
+    
+    async def get_tool(self, name: str) -> BaseTool:
+        """Get the live tool for a cached tool name, connecting on first use"""
+        if self._ready is None:
+            logger.info("🔌 Connecting to %s MCP server on first use...", self.server_name)
+            self._ready = asyncio.get_running_loop().create_future()
+            self._task = asyncio.create_task(self._run(self._ready))
+        tools = await asyncio.shield(self._ready)
+        if name not in tools:
+            # The server no longer offers this tool, so the cached catalog is out of date
+            _drop_tool_schemas(self.cache_key)
+        return tools[name]
+    
+    def make_tool(self, schema: dict) -> BaseTool:
+        """Create a stub tool from a cached schema that forwards calls to the live tool"""
+        name = schema["name"]
+        
+        async def call_tool(**arguments):
+            tool = await self.get_tool(name)
+            return await tool.ainvoke(arguments)
+        
+        return StructuredTool(
+            name=name,
+            description=schema.get("description") or "",
+            args_schema=schema["inputSchema"],
+            coroutine=call_tool,
+        )
+    
+    def stop(self) -> Optional[asyncio.Task]:
+        """Signal the connection task to close, returning the task to wait on (None if never opened)"""
+        self._closing.set()
+        return self._task
+
+
+class _MCPConnection:
+    """
+    MCP server connection held open by one dedicated task
+    
+    The client and session are entered on an exit stack when the task starts
+    and unwound by the same task once the connection is closed, since the MCP
+    client's cancel scopes must be exited in the task that entered them.
+    Used as a client in MCPClientManager.server_pool, which closes it via stop().
+    """
+    
+    def __init__(self, server_name: str, server_params: dict):
+        self.server_name = server_name
+        self.server_params = server_params
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    async def _run(self, ready: asyncio.Future, timeout: float) -> None:
+        """Open the connection, publish (session, tools) and hold it open until closed"""
+        try:
+            # Client and session share one exit stack owned by this task: they are
+            # closed in LIFO order, and a failure part-way through unwinds whatever was opened
+            async with AsyncExitStack() as stack:
+                async with asyncio.timeout(timeout):
+                    read, write, _ = await stack.enter_async_context(streamablehttp_client(**self.server_params))
+                    session = await stack.enter_async_context(ClientSession(read, write))
+                    await session.initialize()
+                    tools = await load_mcp_tools(session)
+                ready.set_result((session, tools))
+                await self._closing.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning("⚠️  Error closing %s MCP session: %s", self.server_name, e)
+        finally:
+            if not ready.done():
+                ready.cancel()
+    
+    async def open(self, timeout: float) -> tuple:
+        """
+        Start the connection task and wait until the session is initialized
+        
+        Args:
+            timeout: Seconds allowed for connecting, initializing the session and listing its tools
+            
+        Returns:
+            Tuple of (session, tools)
+        """
+        ready = asyncio.get_running_loop().create_future()
+        self._task = asyncio.create_task(self._run(ready, timeout))
+        try:
+            return await asyncio.shield(ready)
+        except asyncio.CancelledError:
+            # The caller gave up: unwind the connection inside its own task
+            self._task.cancel()
+            raise
+    
+    def stop(self) -> Optional[asyncio.Task]:
+        """Signal the connection task to close, returning the task to wait on"""
+        self._closing.set()
+        return self._task
 
 
 class MCPClientManager:
     """Context manager to maintain MCP sessions - supports both local and remote servers"""
     
+    # Upper bound on servers being connected to at the same time
+    MAX_CONCURRENT_CONNECTIONS = 8
+    
+    # Seconds allowed for connecting to a server and listing its tools
+    CONNECT_TIMEOUT = 30
+    
+    # Seconds allowed for closing all sessions before the remaining ones are cancelled
+    CLOSE_TIMEOUT = 1.0
+    
     def __init__(self, mcp_servers: list[dict], prefer_local: bool = True):
         """
         Initialize with a list of MCP server configurations
@@ -21,9 +297,30 @@ class MCPClientManager:
         """
         self.mcp_servers = mcp_servers
         self.prefer_local = prefer_local
-        self.sessions = []
+        # Server name -> (connection or lazy connection, session); tools call their
+        # server through this pool. Calls are not serialized per server: MCP sessions
+        # multiplex requests by id, so parallel tool calls to one server run concurrently
+        self.server_pool: Dict[str, tuple] = {}
+        self._server_tools: Dict[str, Dict[str, BaseTool]] = {}
         self.tools: List[BaseTool] = []
         self.local_servers_used = set()
+        # One pool for every server, so sessions reuse TCP/TLS connections
+        self._http_pool = _create_http_pool()
+    
+    def _http_client_factory(
+        self,
+        headers: Optional[dict] = None,
+        timeout: Optional[httpx.Timeout] = None,
+        auth: Optional[httpx.Auth] = None,
+    ) -> httpx.AsyncClient:
+        """httpx client factory for streamablehttp_client backed by the shared pool"""
+        return httpx.AsyncClient(
+            transport=_SharedTransport(self._http_pool),
+            headers=headers,
+            timeout=timeout or httpx.Timeout(30.0),
+            auth=auth,
+            follow_redirects=True,
+        )
         
     async def __aenter__(self):
         """Load tools from all configured MCP servers and keep sessions alive"""
@@ -32,8 +329,7 @@ class MCPClientManager:
         # If prefer_local is True, optimize to use local server URLs when available
         if self.prefer_local:
             try:
-                import os
-                from mcp_servers.registry import get_mcp_server
+                get_mcp_server = _resolve_get_mcp_server()
                 
                 # Get base URL for local servers
                 # For local server connections, ALWAYS use localhost - this is more efficient
@@ -56,111 +352,171 @@ class MCPClientManager:
                         old_url = server_config.get("url", "")
                         server_config["url"] = local_url
                         self.local_servers_used.add(config_name)
-                        print(f"🔄 Using local MCP server for {config_name} (was: {old_url})")
+                        logger.info("🔄 Using local MCP server for %s (was: %s)", config_name, old_url)
             except Exception as e:
-                print(f"Note: Could not optimize to local servers: {e}")
+                logger.warning("Note: Could not optimize to local servers: %s", e)
         
         # Now load all configured servers (only from config, no auto-discovery)
-        for server_config in self.mcp_servers:
+        # Servers are connected concurrently so startup costs one round trip, not N
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_CONNECTIONS)
+        
+        async def connect_bounded(server_config: dict, output: List[str]):
+            async with semaphore:
+                return await self._connect_one(server_config, output)
+        
+        # Progress lines are buffered per server and printed after gather,
+        # so output stays in config order regardless of which server answers first
+        outputs: List[List[str]] = [[] for _ in self.mcp_servers]
+        tasks = [
+            asyncio.create_task(connect_bounded(server_config, output))
+            for server_config, output in zip(self.mcp_servers, outputs)
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        for server_config, output, result in zip(self.mcp_servers, outputs, results):
             server_name = server_config.get("name", "Unknown")
-            server_name_lower = server_name.lower()
             server_url = server_config["url"]
-            server_headers = server_config.get("headers", {})
-            api_key = server_config.get("api_key")
-            
-            # Normalize URL: remove /sse and ensure /mcp endpoint
-            final_url = server_url.rstrip('/')
-            if final_url.endswith('/sse'):
-                final_url = final_url[:-4]  # Remove /sse
-            if not final_url.endswith('/mcp'):
-                # If URL doesn't end with /mcp, append it
-                final_url = final_url.rstrip('/') + '/mcp'
             
-            print(f"Loading tools from {server_name} MCP server ({final_url})...")
+            for line in output:
+                logger.info("%s", line)
             
-            try:
-                # Prepare server params
-                server_params = {"url": final_url}
-                
-                # Build headers: start with existing headers
-                headers = dict(server_headers) if server_headers else {}
-                
-                # Add API key header if provided
-                # Support custom header name via api_key_header, default to x-api-key
-                if api_key:
-                    api_key_header = server_config.get("api_key_header", "x-api-key")
-                    headers[api_key_header] = api_key
-                
-                if headers:
-                    server_params["headers"] = headers
-                
-                # Connect to server with timeout and better error handling
-                client = streamablehttp_client(**server_params)
-                read, write, _ = await client.__aenter__()
-                session = ClientSession(read, write)
-                await session.__aenter__()
-                await session.initialize()
-                
-                # Load tools
-                tools = await load_mcp_tools(session)
-                self.tools.extend(tools)
-                self.sessions.append((client, session))
-                
-                print(f"✓ Loaded {len(tools)} tool(s) from {server_name} MCP server")
-                for tool in tools:
-                    print(f"  - {tool.name}: {tool.description}")
-            except Exception as e:
-                error_msg = str(e)
+            if isinstance(result, BaseException):
+                error_msg = str(result)
                 # Don't fail completely on 502/connection errors - just log and continue
                 if "502" in error_msg or "Bad Gateway" in error_msg:
-                    print(f"⚠️  {server_name} MCP server unavailable (502): {server_url}")
-                    print(f"   This is likely a temporary server issue. Consider using local servers.")
+                    logger.warning("⚠️  %s MCP server unavailable (502): %s", server_name, server_url)
+                    logger.warning("   This is likely a temporary server issue. Consider using local servers.")
                 elif "cancel scope" in error_msg.lower():
-                    print(f"⚠️  Connection issue with {server_name}: async context error")
+                    logger.warning("⚠️  Connection issue with %s: async context error", server_name)
                 else:
-                    print(f"✗ Failed to load {server_name} MCP tools: {error_msg}")
+                    logger.error("✗ Failed to load %s MCP tools: %s", server_name, error_msg)
+                logger.info("")  # Empty line between servers
+                continue
             
-            print()  # Empty line between servers
+            client, session, tools = result
+            pool_key = server_name
+            if pool_key in self.server_pool:
+                pool_key = f"{server_name}#{len(self.server_pool)}"
+            self.server_pool[pool_key] = (client, session)
+            self._server_tools[pool_key] = {tool.name: tool for tool in tools}
+            self.tools.extend(self._pooled_tool(pool_key, tool) for tool in tools)
         
         return self.tools
     
+    async def call_tool(self, server_name: str, name: str, args: dict) -> Any:
+        """
+        Call a tool of a connected server through the server pool
+        
+        Args:
+            server_name: Pool key of the server (its configured name)
+            name: Tool name
+            args: Tool arguments
+            
+        Returns:
+            The tool's output, or a ToolException if the server cannot be reached
+            or no longer offers the tool
+        """
+        try:
+            return await self._server_tools[server_name][name].ainvoke(args)
+        except (McpError, httpx.HTTPError, OSError, TimeoutError, KeyError, ExceptionGroup) as e:
+            # Surfaced as tool errors, so the model gets a tool result instead of the run failing
+            raise ToolException(f"{name} failed on {server_name} MCP server: {e!r}") from e
+    
+    def _pooled_tool(self, server_name: str, tool: BaseTool) -> BaseTool:
+        """Wrap a loaded tool so that its calls are routed through call_tool"""
+        async def call_tool(**arguments):
+            return await self.call_tool(server_name, tool.name, arguments)
+        
+        return StructuredTool(
+            name=tool.name,
+            description=tool.description,
+            args_schema=tool.args_schema,
+            coroutine=call_tool,
+            # handle_tool_error only catches ToolException: call_tool converts connection,
+            # transport and lookup failures into one, so they come back to the model as
+            # tool results and one failing call does not abort the others of a parallel step
+            handle_tool_error=True,
+        )
+    
+    async def _connect_one(self, server_config: dict, output: List[str]) -> tuple:
+        """
+        Connect to a single MCP server and load its tools
+        
+        Args:
+            server_config: Server config with 'name', 'url', and optional 'headers'/'api_key'
+            output: List that progress lines are appended to instead of printed
+            
+        Returns:
+            Tuple of (connection or lazy connection, session, tools)
+        """
+        server_name = server_config.get("name", "Unknown")
+        server_url = server_config["url"]
+        server_headers = server_config.get("headers", {})
+        api_key = server_config.get("api_key")
+        
+        final_url = normalize_mcp_url(server_url)
+        
+        output.append(f"Loading tools from {server_name} MCP server ({final_url})...")
+        
+        # Prepare server params
+        server_params = {"url": final_url, "httpx_client_factory": self._http_client_factory}
+        
+        # Configured headers are passed through as-is; they are only copied
+        # when an API key header has to be added, so the config is not mutated
+        # Support custom header name via api_key_header, default to x-api-key
+        headers = server_headers
+        if api_key:
+            api_key_header = server_config.get("api_key_header", "x-api-key")
+            headers = {**(server_headers or {}), api_key_header: api_key}
+        
+        if headers:
+            server_params["headers"] = headers
+        
+        # Fresh cached catalog: skip the handshake and connect on the first tool call
+        cache_key = _catalog_key(server_config, final_url)
+        cached_schemas = _get_cached_tool_schemas(cache_key)
+        if cached_schemas is not None:
+            client = _LazyMCPConnection(server_name, server_params, cached_schemas, cache_key, self.CONNECT_TIMEOUT)
+            session = None
+            tools = [client.make_tool(schema) for schema in cached_schemas]
+            output.append(f"⚡ Using cached tool catalog for {server_name} (connects on first use)")
+        else:
+            client = _MCPConnection(server_name, server_params)
+            session, tools = await client.open(self.CONNECT_TIMEOUT)
+            _save_tool_schemas(cache_key, tools)
+        
+        output.append(f"✓ Loaded {len(tools)} tool(s) from {server_name} MCP server")
+        # Per-tool listing only at DEBUG; large catalogs make it the bulk of startup output
+        if logger.isEnabledFor(logging.DEBUG):
+            for tool in tools:
+                output.append(f"  - {tool.name}: {tool.description}")
+        output.append("")  # Empty line between servers
+        
+        return client, session, tools
+    
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Clean up all sessions - improved error handling"""
-        if not self.sessions:
+        if not self.server_pool:
+            await self._http_pool.aclose()
             return  # No sessions to close
         
-        print("\n🔄 Closing MCP sessions...")
-        import asyncio
-        
-        # Suppress all errors during cleanup - they're expected due to async context manager
-        # limitations when cleanup happens in different tasks
-        for client, session in reversed(self.sessions):
-            # Close session first - suppress all errors
-            if session:
-                try:
-                    # Use wait_for with short timeout to prevent hanging
-                    await asyncio.wait_for(
-                        session.__aexit__(exc_type, exc_val, exc_tb),
-                        timeout=1.0
-                    )
-                except Exception:
-                    # Suppress all exceptions during cleanup - they're expected
-                    # The MCP library creates background tasks that can't be properly
-                    # closed when cleanup happens in a different task context
-                    pass
-            
-            # Then close client - suppress all errors
-            if client:
-                try:
-                    await asyncio.wait_for(
-                        client.__aexit__(exc_type, exc_val, exc_tb),
-                        timeout=1.0
-                    )
-                except Exception:
-                    # Suppress all exceptions during cleanup
-                    pass
-        
-        self.sessions.clear()
-        print("✓ All MCP sessions closed")
+        logger.info("\n🔄 Closing MCP sessions...")
+        
+        # Each connection is closed by the task that opened it: all of them are
+        # signalled first and then awaited, so servers close concurrently and
+        # shutdown does not grow with the number of servers
+        tasks = [task for task in (client.stop() for client, _ in self.server_pool.values()) if task]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=self.CLOSE_TIMEOUT)
+            # Cancelled connections still unwind inside their own task, and the
+            # shared pool is only closed once every one of them has finished
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        
+        self.server_pool.clear()
+        self._server_tools.clear()
+        await self._http_pool.aclose()
+        logger.info("✓ All MCP sessions closed")
 
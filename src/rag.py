@@ -1,19 +1,128 @@
 """
-RAG (Retrieval Augmented Generation) system with FAISS vectorstore
+RAG (Retrieval Augmented Generation) system with a numpy similarity index
 """
-from langchain_community.vectorstores import FAISS
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator
+
+import numpy as np
 from langchain_openai import OpenAIEmbeddings, ChatOpenAI
+from langchain_core.documents import Document
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.embeddings import Embeddings
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.runnables import Runnable
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_classic.chains import create_retrieval_chain, create_history_aware_retriever
 from langchain_classic.chains.combine_documents import create_stuff_documents_chain
+from langchain_classic.embeddings import CacheBackedEmbeddings
+from langchain_classic.storage import LocalFileStore
 
 from .history import history_manager
 
+# Embeddings of the static corpus are persisted here (as JSON, never pickled),
+# so restarts do not re-embed unchanged texts over the network
+RAG_CACHE_DIR = Path("~/.cache/rag-mcp").expanduser()
+EMBEDDING_CACHE_DIR = RAG_CACHE_DIR / "embeddings"
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so trivially different queries share cache entries"""
+    return " ".join(query.lower().split())
+
+
+def _with_disk_cache(embeddings: OpenAIEmbeddings) -> Embeddings:
+    """Back embeddings with the on-disk cache, or return them as-is if the cache directory is not writable"""
+    try:
+        EMBEDDING_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        if not os.access(EMBEDDING_CACHE_DIR, os.W_OK):
+            raise PermissionError(f"{EMBEDDING_CACHE_DIR} is not writable")
+    except OSError as e:
+        # Read-only home or container filesystem: embed over the network every start instead
+        print(f"⚠️  Embedding cache unavailable, embedding without it: {e}")
+        return embeddings
+    return CacheBackedEmbeddings.from_bytes_store(
+        embeddings,
+        LocalFileStore(str(EMBEDDING_CACHE_DIR)),
+        namespace=embeddings.model,
+    )
+
+
+class _QueryEmbeddingCache(Embeddings):
+    """Embeddings wrapper that memoizes query embeddings in a small in-memory LRU"""
+    
+    def __init__(self, embeddings: Embeddings, max_entries: int = 256):
+        self._embeddings = embeddings
+        self._max_entries = max_entries
+        self._cache: OrderedDict = OrderedDict()
+    
+    @staticmethod
+    def _key(text: str) -> str:
+        """Cache key of a query text"""
+        return hashlib.sha1(normalize_query(text).encode("utf-8")).hexdigest()
+    
+    def _get(self, key: str):
+        """Look up a cached embedding, marking it most recently used"""
+        vector = self._cache.get(key)
+        if vector is not None:
+            self._cache.move_to_end(key)
+        return vector
+    
+    def _put(self, key: str, vector: list[float]) -> list[float]:
+        """Cache an embedding, evicting the least recently used one when full"""
+        self._cache[key] = vector
+        if len(self._cache) > self._max_entries:
+            self._cache.popitem(last=False)
+        return vector
+    
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embeddings.embed_documents(texts)
+    
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self._embeddings.aembed_documents(texts)
+    
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vector = self._get(key)
+        return vector if vector is not None else self._put(key, self._embeddings.embed_query(text))
+    
+    async def aembed_query(self, text: str) -> list[float]:
+        key = self._key(text)
+        vector = self._get(key)
+        return vector if vector is not None else self._put(key, await self._embeddings.aembed_query(text))
+
+
+class _CorpusRetriever(BaseRetriever):
+    """LangChain retriever over EnhancedRAGSystem's numpy index, so chains rank like the RAG tool"""
+    
+    rag: Any
+    
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return self.rag.retrieve_documents(query)
+    
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return await self.rag.aretrieve_documents(query)
+
 
 class EnhancedRAGSystem:
     """Enhanced RAG system with better context retrieval and history awareness"""
     
+    # Maximum number of assembled chains kept alive (one per distinct LLM instance)
+    MAX_CACHED_CHAINS = 4
+    
+    # Number of documents retrieved per query
+    TOP_K = 3
+    
+    # Maximum number of retrieved context texts kept, keyed on the normalized query
+    MAX_CACHED_CONTEXTS = 256
+    
     def __init__(self):
         """Initialize the RAG system with DosiBlog context"""
         self.texts = [
@@ -25,47 +134,9 @@ class EnhancedRAGSystem:
             "The project uses RESTful API architecture for communication between frontend and backend.",
         ]
         
-        try:
-            self.embeddings = OpenAIEmbeddings()
-            self.vectorstore = FAISS.from_texts(self.texts, embedding=self.embeddings)
-            self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": 3})
-            self.available = True
-            print("✓ Enhanced RAG System initialized with FAISS vectorstore")
-        except Exception as e:
-            print(f"⚠️  FAISS not available, RAG tool disabled: {e}")
-            self.available = False
-    
-    def retrieve_context(self, query: str) -> str:
-        """Retrieve relevant context for a query"""
-        if not self.available:
-            return "RAG system not available."
-        
-        try:
-            docs = self.retriever.invoke(query)
-            if docs:
-                contexts = [doc.page_content for doc in docs]
-                return "\n".join(contexts)
-            return "No relevant context found."
-        except Exception as e:
-            return f"Error retrieving context: {e}"
-    
-    def query_with_history(self, query: str, session_id: str, llm: ChatOpenAI) -> str:
-        """
-        Query the RAG system with conversation history
-        
-        Args:
-            query: User's question
-            session_id: Session identifier
-            llm: Language model to use
-            
-        Returns:
-            Answer with context from both RAG and history
-        """
-        if not self.available:
-            return "RAG system not available."
-        
+        # Prompts do not depend on the LLM, so they are built once and shared by all chains
         # Contextualization prompt for history-aware retrieval
-        contextualize_prompt = ChatPromptTemplate.from_messages([
+        self._contextualize_prompt = ChatPromptTemplate.from_messages([
             ("system", 
              "Given a chat history and the latest user question, "
              "formulate a standalone question which can be understood without the chat history. "
@@ -75,7 +146,7 @@ class EnhancedRAGSystem:
         ])
         
         # Answer prompt
-        answer_prompt = ChatPromptTemplate.from_messages([
+        self._answer_prompt = ChatPromptTemplate.from_messages([
             ("system", 
              "You are a helpful AI assistant. Use the following context to answer questions accurately and naturally.\n"
              "Context: {context}\n\n"
@@ -87,34 +158,231 @@ class EnhancedRAGSystem:
             ("human", "{input}"),
         ])
         
+        # LRU of context texts keyed on the normalized query, shared by
+        # retrieve_context and aretrieve_context
+        self._context_cache: OrderedDict = OrderedDict()
+        
+        # Conversational chains keyed on id(llm); the cached chain holds a reference
+        # to its LLM, so the id cannot be reused while the entry is alive
+        self._chain_by_llm_id: OrderedDict = OrderedDict()
+        
+        try:
+            # Repeated queries (tool calls, RAG chains, the semantic cache) reuse
+            # their embedding instead of another API round trip
+            self.embeddings = _QueryEmbeddingCache(_with_disk_cache(OpenAIEmbeddings()))
+            # The whole corpus is embedded in one batched request (or read from the
+            # embedding cache). It is tiny, so every retrieval scores it with one
+            # matrix-vector product over the L2-normalized embeddings (cosine
+            # similarity), stored as int8 with a per-vector scale to cut memory 4x
+            doc_embeddings = np.asarray(self.embeddings.embed_documents(self.texts), dtype=np.float32)
+            doc_embeddings /= np.linalg.norm(doc_embeddings, axis=1, keepdims=True)
+            self._doc_embeddings_i8, self._doc_scales = self._quantize(doc_embeddings)
+            self._documents = [Document(page_content=text) for text in self.texts]
+            
+            # Chains retrieve through the same index as retrieve_context
+            self.retriever = _CorpusRetriever(rag=self)
+            self.available = True
+            print("✓ Enhanced RAG System initialized with numpy similarity index")
+        except Exception as e:
+            print(f"⚠️  RAG system not available, RAG tool disabled: {e}")
+            self.available = False
+    
+    @staticmethod
+    def _quantize(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Symmetric per-vector int8 quantization, returning (int8 values, float32 scales)"""
+        scales = np.abs(vectors).max(axis=-1, keepdims=True) / 127.0
+        scales[scales == 0] = 1.0
+        return np.round(vectors / scales).astype(np.int8), scales.astype(np.float32)
+    
+    def _top_k_indices(self, embedding: list[float]) -> np.ndarray:
+        """Indices of the TOP_K texts most similar to a query embedding, best match first"""
+        query_embedding = np.asarray(embedding, dtype=np.float32)
+        query_embedding /= np.linalg.norm(query_embedding)
+        query_i8, query_scale = self._quantize(query_embedding)
+        # Accumulate in int32: a 1536-dim sum of int8 products overflows int16
+        scores = (
+            (self._doc_embeddings_i8.astype(np.int32) @ query_i8.astype(np.int32)).astype(np.float32)
+            * self._doc_scales[:, 0] * query_scale[0]
+        )
+        k = min(self.TOP_K, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top])]
+    
+    def retrieve_documents(self, query: str) -> list[Document]:
+        """Retrieve the documents relevant to a query, best match first"""
+        if not self.available:
+            return []
+        embedding = self.embeddings.embed_query(normalize_query(query))
+        return [self._documents[i] for i in self._top_k_indices(embedding)]
+    
+    async def aretrieve_documents(self, query: str) -> list[Document]:
+        """Retrieve the documents relevant to a query without blocking the event loop"""
+        if not self.available:
+            return []
+        # Query embeddings are memoized, so warm queries never leave the process
+        embedding = await self.embeddings.aembed_query(normalize_query(query))
+        return [self._documents[i] for i in self._top_k_indices(embedding)]
+    
+    def retrieve_context(self, query: str) -> str:
+        """Retrieve relevant context for a query"""
+        if not self.available:
+            return "RAG system not available."
+        
+        key = normalize_query(query)
+        context = self._get_cached_context(key)
+        if context is not None:
+            return context
+        try:
+            return self._cache_context(key, self._join_context(self.retrieve_documents(key)))
+        except Exception as e:
+            return f"Error retrieving context: {e}"
+    
+    async def aretrieve_context(self, query: str) -> str:
+        """Retrieve relevant context for a query without blocking the event loop"""
+        if not self.available:
+            return "RAG system not available."
+        
+        # Checked before awaiting, so repeated queries return without a suspension point
+        key = normalize_query(query)
+        context = self._get_cached_context(key)
+        if context is not None:
+            return context
+        try:
+            return self._cache_context(key, self._join_context(await self.aretrieve_documents(key)))
+        except Exception as e:
+            return f"Error retrieving context: {e}"
+    
+    def _get_cached_context(self, key: str):
+        """Look up the cached context text of a normalized query, marking it most recently used"""
+        context = self._context_cache.get(key)
+        if context is not None:
+            self._context_cache.move_to_end(key)
+        return context
+    
+    def _cache_context(self, key: str, context: str) -> str:
+        """Cache the context text of a normalized query, evicting the least recently used one when full"""
+        self._context_cache[key] = context
+        if len(self._context_cache) > self.MAX_CACHED_CONTEXTS:
+            self._context_cache.popitem(last=False)
+        return context
+    
+    @staticmethod
+    def _join_context(docs: list[Document]) -> str:
+        """Context text made of the retrieved documents"""
+        text = "\n".join(doc.page_content for doc in docs)
+        return text or "No relevant context found."
+    
+    def _build_chain(self, llm: ChatOpenAI) -> Runnable:
+        """
+        Assemble the history-aware conversational RAG chain for an LLM
+        
+        Args:
+            llm: Language model to use
+            
+        Returns:
+            Runnable wrapped with message history
+        """
         # Create history-aware retriever
         history_aware_retriever = create_history_aware_retriever(
-            llm, self.retriever, contextualize_prompt
+            llm, self.retriever, self._contextualize_prompt
         )
         
         # Create question answering chain
-        question_answer_chain = create_stuff_documents_chain(llm, answer_prompt)
+        question_answer_chain = create_stuff_documents_chain(llm, self._answer_prompt)
         
         # Create retrieval chain
         rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
         
         # Wrap with history
-        conversational_rag_chain = RunnableWithMessageHistory(
+        return RunnableWithMessageHistory(
             rag_chain,
-            lambda sid: history_manager.get_session_history(sid),
+            history_manager.get_session_history,
             input_messages_key="input",
             history_messages_key="chat_history",
             output_messages_key="answer",
         )
+    
+    def _get_chain(self, llm: ChatOpenAI) -> Runnable:
+        """Get the cached conversational chain for an LLM, building it on first use"""
+        key = id(llm)
+        chain = self._chain_by_llm_id.get(key)
+        if chain is None:
+            chain = self._build_chain(llm)
+            self._chain_by_llm_id[key] = chain
+            if len(self._chain_by_llm_id) > self.MAX_CACHED_CHAINS:
+                self._chain_by_llm_id.popitem(last=False)
+        else:
+            self._chain_by_llm_id.move_to_end(key)
+        return chain
+    
+    def query_with_history(self, query: str, session_id: str, llm: ChatOpenAI) -> str:
+        """
+        Query the RAG system with conversation history
         
-        # Execute query
-        result = conversational_rag_chain.invoke(
+        Args:
+            query: User's question
+            session_id: Session identifier
+            llm: Language model to use
+            
+        Returns:
+            Answer with context from both RAG and history
+        """
+        if not self.available:
+            return "RAG system not available."
+        
+        # Execute query on the cached chain for this LLM
+        chain = self._get_chain(llm)
+        result = chain.invoke(
             {"input": query},
             config={"configurable": {"session_id": session_id}},
         )
         
         return result["answer"]
 
+    
+    async def aquery_with_history(self, query: str, session_id: str, llm: ChatOpenAI) -> str:
+        """
+        Async variant of query_with_history that does not block the event loop
+        
+        The answer is collected from astream_with_history, so with a streaming
+        LLM generation is pipelined instead of waiting on a single response.
+        
+        Args:
+            query: User's question
+            session_id: Session identifier
+            llm: Language model to use
+            
+        Returns:
+            Answer with context from both RAG and history
+        """
+        return "".join([
+            piece async for piece in self.astream_with_history(query, session_id, llm)
+        ])
+    
+    async def astream_with_history(self, query: str, session_id: str, llm: ChatOpenAI) -> AsyncIterator[str]:
+        """
+        Stream the answer to a history-aware RAG query token by token
+        
+        Args:
+            query: User's question
+            session_id: Session identifier
+            llm: Language model to use (should be created with streaming enabled)
+            
+        Yields:
+            Pieces of the answer as the LLM generates them
+        """
+        if not self.available:
+            yield "RAG system not available."
+            return
+        
+        chain = self._get_chain(llm)
+        async for chunk in chain.astream(
+            {"input": query},
+            config={"configurable": {"session_id": session_id}},
+        ):
+            answer = chunk.get("answer")
+            if answer:
+                yield answer
 
 # Global RAG system instance
 rag_system = EnhancedRAGSystem()
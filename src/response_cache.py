@@ -0,0 +1,59 @@
+"""
+Response cache for history-free RAG queries
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from langchain_core.documents import Document
+
+from .rag import normalize_query
+
+
+class ResponseCache:
+    """LRU cache of RAG answers keyed on normalized question + retrieved documents"""
+    
+    def __init__(self, max_entries: int = 256):
+        """
+        Initialize the cache
+        
+        Args:
+            max_entries: Maximum number of answers kept before evicting the oldest
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+    
+    def make_key(self, question: str, docs: Iterable[Document]) -> str:
+        """
+        Build a cache key from the question and the documents retrieved for it
+        
+        Including the retrieved documents means a cached answer is only reused
+        when the LLM would see exactly the same context.
+        """
+        doc_ids = sorted(doc.id or doc.page_content for doc in docs)
+        # Same normalization as the query embedding cache, so the two keys cannot drift apart
+        raw = normalize_query(question) + "|" + ",".join(doc_ids)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str) -> Optional[dict]:
+        """Return the cached entry ({answer, created_at}) for a key, if any"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+    
+    def put(self, key: str, answer: str) -> None:
+        """Store an answer, evicting the least recently used entry when full"""
+        self._entries[key] = {"answer": answer, "created_at": time.time()}
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all cached answers"""
+        self._entries.clear()
+
+
+# Global response cache instance
+response_cache = ResponseCache()
@@ -0,0 +1,121 @@
+"""
+Semantic response cache for history-free RAG queries
+"""
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+try:
+    import faiss
+except ImportError:
+    faiss = None
+
+
+class SemanticCache:
+    """
+    LRU cache of RAG answers looked up by question embedding similarity
+    
+    Complements ResponseCache: paraphrased questions miss the exact-match key
+    but land close together in embedding space, so the nearest cached question
+    is reused when it is similar enough and was answered from (mostly) the
+    same retrieved documents.
+    """
+    
+    def __init__(
+        self,
+        similarity_threshold: float = 0.97,
+        min_context_overlap: float = 0.8,
+        max_entries: int = 10000,
+    ):
+        """
+        Initialize the cache
+        
+        Args:
+            similarity_threshold: Minimum cosine similarity to reuse a cached answer
+            min_context_overlap: Minimum fraction of shared retrieved documents
+            max_entries: Maximum number of answers kept before evicting the oldest
+        """
+        self.similarity_threshold = similarity_threshold
+        self.min_context_overlap = min_context_overlap
+        self.max_entries = max_entries
+        self.available = faiss is not None
+        self._index = None  # Created on first add, once the embedding size is known
+        self._entries: OrderedDict = OrderedDict()
+        self._next_id = 0
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        """L2-normalize an embedding so inner product equals cosine similarity"""
+        vector = np.asarray(embedding, dtype="float32").reshape(1, -1)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    @staticmethod
+    def _doc_keys(docs: Iterable[Document]) -> frozenset:
+        """Identify retrieved documents by id, falling back to their content"""
+        return frozenset(doc.id or doc.page_content for doc in docs)
+    
+    def _context_overlap(self, cached: frozenset, current: frozenset) -> float:
+        """Fraction of retrieved documents shared by two queries"""
+        if not cached and not current:
+            return 1.0
+        return len(cached & current) / max(len(cached), len(current))
+    
+    def lookup(self, embedding: List[float], docs: Iterable[Document]) -> Optional[dict]:
+        """
+        Find a cached answer for a question embedding
+        
+        Args:
+            embedding: Embedding of the new question
+            docs: Documents retrieved for the new question
+        
+        Returns:
+            Cached entry ({answer, created_at, score}) or None on a miss
+        """
+        if self._index is None or not self._entries:
+            return None
+        
+        scores, ids = self._index.search(self._normalize(embedding), 1)
+        score, entry_id = float(scores[0][0]), int(ids[0][0])
+        entry = self._entries.get(entry_id)
+        if entry is None or score < self.similarity_threshold:
+            return None
+        if self._context_overlap(entry["doc_keys"], self._doc_keys(docs)) < self.min_context_overlap:
+            return None
+        
+        self._entries.move_to_end(entry_id)
+        return {"answer": entry["answer"], "created_at": entry["created_at"], "score": score}
+    
+    def add(self, embedding: List[float], answer: str, docs: Iterable[Document]) -> None:
+        """Store an answer, evicting the least recently used entry when full"""
+        if not self.available:
+            return
+        
+        vector = self._normalize(embedding)
+        if self._index is None:
+            self._index = faiss.IndexIDMap(faiss.IndexFlatIP(vector.shape[1]))
+        
+        entry_id = self._next_id
+        self._next_id += 1
+        self._index.add_with_ids(vector, np.array([entry_id], dtype="int64"))
+        self._entries[entry_id] = {
+            "answer": answer,
+            "doc_keys": self._doc_keys(docs),
+            "created_at": time.time(),
+        }
+        
+        if len(self._entries) > self.max_entries:
+            evicted_id, _ = self._entries.popitem(last=False)
+            self._index.remove_ids(np.array([evicted_id], dtype="int64"))
+    
+    def clear(self) -> None:
+        """Drop all cached answers"""
+        self._entries.clear()
+        self._index = None
+
+
+# Global semantic cache instance
+semantic_cache = SemanticCache()
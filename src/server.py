@@ -0,0 +1,87 @@
+"""
+Long-lived agent server - MCP sessions and the agent are created once at startup
+and shared by every query
+"""
+import contextlib
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel
+
+from src.config import Config
+from src.agent import create_agent_executor, run_agent_query
+from src.history import history_manager
+from src.llm_factory import aclose_llm_http_pool
+from src.logging_setup import get_output_logger
+from src.mcp_client import MCPClientManager
+
+
+logger = get_output_logger(__name__)
+
+
+@contextlib.asynccontextmanager
+async def agent_lifespan(app: FastAPI):
+    """Connect to the configured MCP servers and build the agent once per process"""
+    mcp_servers = Config.load_mcp_servers()
+    
+    # Local MCP servers are mounted by src.api, not by this app, so always use
+    # the configured URLs instead of rewriting them to this process
+    async with MCPClientManager(mcp_servers, prefer_local=False) as mcp_tools:
+        app.state.agent_executor = create_agent_executor(mcp_tools)
+        logger.info("✓ Agent ready with %d tool(s)", len(mcp_tools) + 1)
+        yield
+        await history_manager.write_barrier.wait_all()
+    await aclose_llm_http_pool()
+
+
+app = FastAPI(
+    title="AI MCP Agent Server",
+    description="Persistent agent that keeps MCP sessions open across queries",
+    version="1.0.0",
+    lifespan=agent_lifespan
+)
+
+
+class QueryRequest(BaseModel):
+    question: str
+    session_id: str = "default"
+
+
+class QueryResponse(BaseModel):
+    answer: str
+    session_id: str
+
+
+@app.post("/query", response_model=QueryResponse)
+async def query(request: QueryRequest, http_request: Request):
+    """
+    Run a question through the shared agent
+    
+    Args:
+        request: QueryRequest with question and session_id
+    
+    Returns:
+        QueryResponse with the final answer
+    """
+    try:
+        answer = await run_agent_query(
+            http_request.app.state.agent_executor,
+            request.question,
+            request.session_id
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return QueryResponse(answer=answer, session_id=request.session_id)
+
+
+if __name__ == "__main__":
+    import uvicorn
+    
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "auto"
+    
+    # A single worker keeps one event loop, one set of MCP sessions and one
+    # pooled HTTP client for every request
+    uvicorn.run(app, host="0.0.0.0", port=8001, workers=1, loop=loop)
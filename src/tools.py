@@ -2,13 +2,17 @@
 Tool definitions for the agent
 """
 from langchain_core.tools import tool
+from .logging_setup import get_output_logger
 from .rag import rag_system
 
 
+logger = get_output_logger(__name__)
+
+
 @tool("retrieve_dosiblog_context")
-def retrieve_dosiblog_context(query: str) -> str:
+async def retrieve_dosiblog_context(query: str) -> str:
     """Retrieves relevant context about DosiBlog projects and related topics."""
-    print(f"🔍 Calling Enhanced RAG Tool for query: {query}")
-    context = rag_system.retrieve_context(query)
+    logger.info("🔍 Calling Enhanced RAG Tool for query: %s", query)
+    context = await rag_system.aretrieve_context(query)
     return f"Retrieved context:\n{context}"
 